@@ -0,0 +1,26 @@
+"""add_workspace_status
+
+Revision ID: 003_add_workspace_status
+Revises: 002_add_source_status
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_add_workspace_status'
+down_revision: Union[str, None] = '002_add_source_status'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workspaces', sa.Column('status', sa.String(), server_default='idle', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('workspaces', 'status')
@@ -0,0 +1,30 @@
+"""add_chunk_content_hash
+
+Revision ID: 004_add_chunk_content_hash
+Revises: 003_add_workspace_status
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_add_chunk_content_hash'
+down_revision: Union[str, None] = '003_add_workspace_status'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    # Backfill with the same sha256(text) the ingestion service computes
+    op.execute("UPDATE chunks SET content_hash = encode(sha256(convert_to(text, 'UTF8')), 'hex')")
+    op.create_index(op.f('ix_chunks_content_hash'), 'chunks', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_chunks_content_hash'), table_name='chunks')
+    op.drop_column('chunks', 'content_hash')
@@ -0,0 +1,29 @@
+"""add_source_fingerprints
+
+Revision ID: 005_add_source_fingerprints
+Revises: 004_add_chunk_content_hash
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_add_source_fingerprints'
+down_revision: Union[str, None] = '004_add_chunk_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sources', sa.Column('fingerprint', sa.String(), nullable=True))
+    # Existing documents keep a NULL hash and are simply replaced on their next re-ingest
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'content_hash')
+    op.drop_column('sources', 'fingerprint')
@@ -0,0 +1,29 @@
+"""add_source_content_hash
+
+Revision ID: 006_add_source_content_hash
+Revises: 005_add_source_fingerprints
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_add_source_content_hash'
+down_revision: Union[str, None] = '005_add_source_fingerprints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled in at upload time; older uploads stay NULL and are hashed from disk when ingested
+    op.add_column('sources', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_sources_content_hash'), 'sources', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sources_content_hash'), table_name='sources')
+    op.drop_column('sources', 'content_hash')
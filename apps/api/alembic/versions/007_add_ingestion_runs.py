@@ -0,0 +1,50 @@
+"""add_ingestion_runs
+
+Revision ID: 007_add_ingestion_runs
+Revises: 006_add_source_content_hash
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_add_ingestion_runs'
+down_revision: Union[str, None] = '006_add_source_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_runs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('source_id', sa.String(), nullable=False),
+        sa.Column('workspace_id', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('duration_ms', sa.Float(), nullable=False),
+        sa.Column('timings', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('bytes_in', sa.Integer(), nullable=False),
+        sa.Column('documents', sa.Integer(), nullable=False),
+        sa.Column('chunks_written', sa.Integer(), nullable=False),
+        sa.Column('chunks_embedded', sa.Integer(), nullable=False),
+        sa.Column('chunks_reused', sa.Integer(), nullable=False),
+        sa.Column('cache', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['source_id'], ['sources.id'], ),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ),
+    )
+    op.create_index(op.f('ix_ingestion_runs_source_id'), 'ingestion_runs', ['source_id'], unique=False)
+    op.create_index(op.f('ix_ingestion_runs_workspace_id'), 'ingestion_runs', ['workspace_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingestion_runs_workspace_id'), table_name='ingestion_runs')
+    op.drop_index(op.f('ix_ingestion_runs_source_id'), table_name='ingestion_runs')
+    op.drop_table('ingestion_runs')
@@ -0,0 +1,41 @@
+"""hnsw_embedding_index
+
+Revision ID: 008_hnsw_embedding_index
+Revises: 007_add_ingestion_runs
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from apps.api.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_hnsw_embedding_index'
+down_revision: Union[str, None] = '007_add_ingestion_runs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The ivfflat index from 001 was clustered on an empty table. HNSW needs no
+    # training data and keeps recall as rows are added. Build parameters come from
+    # VECTOR_HNSW_M / VECTOR_HNSW_EF_CONSTRUCTION; to rebuild with other values,
+    # downgrade and upgrade again with the settings changed.
+    m = int(settings.VECTOR_HNSW_M)
+    ef_construction = int(settings.VECTOR_HNSW_EF_CONSTRUCTION)
+    # CONCURRENTLY cannot run in a transaction; ingestion keeps writing during the build
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chunks_embedding")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_chunks_embedding ON chunks "
+            f"USING hnsw (embedding vector_cosine_ops) WITH (m = {m}, ef_construction = {ef_construction})"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chunks_embedding")
+        op.execute("CREATE INDEX CONCURRENTLY ix_chunks_embedding ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)")
@@ -0,0 +1,33 @@
+"""add_chunk_text_search
+
+Revision ID: 009_add_chunk_text_search
+Revises: 008_hnsw_embedding_index
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_add_chunk_text_search'
+down_revision: Union[str, None] = '008_hnsw_embedding_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored generated column: filled for existing rows here, and by Postgres on
+    # every insert after, including COPY and the server-side upload copy
+    op.execute(
+        "ALTER TABLE chunks ADD COLUMN text_search tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY ix_chunks_text_search ON chunks USING gin (text_search)")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunks_text_search', table_name='chunks')
+    op.drop_column('chunks', 'text_search')
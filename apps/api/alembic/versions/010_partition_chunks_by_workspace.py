@@ -0,0 +1,109 @@
+"""partition_chunks_by_workspace
+
+Revision ID: 010_partition_chunks_by_workspace
+Revises: 009_add_chunk_text_search
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from apps.api.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_partition_chunks_by_workspace'
+down_revision: Union[str, None] = '009_add_chunk_text_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, workspace_id, document_id, chunk_index, text, embedding, content_hash, created_at"
+
+
+def _create_indexes() -> None:
+    # Created on the parent, so every partition gets its own copy; an ANN scan
+    # filtered to one workspace only walks the HNSW graph of that workspace's partition
+    m = int(settings.VECTOR_HNSW_M)
+    ef_construction = int(settings.VECTOR_HNSW_EF_CONSTRUCTION)
+    op.execute("CREATE INDEX ix_chunks_document_id ON chunks (document_id)")
+    op.execute("CREATE INDEX ix_chunks_content_hash ON chunks (content_hash)")
+    op.execute("CREATE INDEX ix_chunks_workspace_id ON chunks (workspace_id)")
+    op.execute(
+        "CREATE INDEX ix_chunks_embedding ON chunks "
+        f"USING hnsw (embedding vector_cosine_ops) WITH (m = {m}, ef_construction = {ef_construction})"
+    )
+    op.execute("CREATE INDEX ix_chunks_text_search ON chunks USING gin (text_search)")
+
+
+def _drop_indexes() -> None:
+    for name in ("ix_chunks_document_id", "ix_chunks_content_hash", "ix_chunks_workspace_id",
+                 "ix_chunks_embedding", "ix_chunks_text_search"):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    # Denormalized owner of each chunk, so searches filter chunks directly instead
+    # of through documents and sources after the index scan
+    op.execute("ALTER TABLE chunks ADD COLUMN workspace_id varchar")
+    op.execute("""
+        UPDATE chunks c SET workspace_id = s.workspace_id
+        FROM documents d JOIN sources s ON s.id = d.source_id
+        WHERE d.id = c.document_id
+    """)
+
+    # Rebuild as a hash-partitioned table. The old table is copied before any
+    # index exists on the new one, which is much faster than indexing row by row.
+    # This takes the table offline for the duration of the copy.
+    _drop_indexes()
+    op.execute("ALTER TABLE chunks RENAME TO chunks_unpartitioned")
+    op.execute("ALTER TABLE chunks_unpartitioned RENAME CONSTRAINT chunks_pkey TO chunks_unpartitioned_pkey")
+    op.execute("""
+        CREATE TABLE chunks (
+            id varchar NOT NULL,
+            workspace_id varchar NOT NULL REFERENCES workspaces (id),
+            document_id varchar NOT NULL REFERENCES documents (id),
+            chunk_index integer NOT NULL,
+            text text NOT NULL,
+            embedding vector(384),
+            content_hash varchar(64),
+            text_search tsvector GENERATED ALWAYS AS (to_tsvector('english', text)) STORED,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, workspace_id)
+        ) PARTITION BY HASH (workspace_id)
+    """)
+    partitions = int(settings.VECTOR_PARTITIONS)
+    for i in range(partitions):
+        op.execute(f"CREATE TABLE chunks_p{i} PARTITION OF chunks FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})")
+    op.execute(f"INSERT INTO chunks ({COLUMNS}) SELECT {COLUMNS} FROM chunks_unpartitioned")
+    op.execute("DROP TABLE chunks_unpartitioned")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _drop_indexes()
+    op.execute("ALTER TABLE chunks RENAME TO chunks_partitioned")
+    op.execute("""
+        CREATE TABLE chunks (
+            id varchar NOT NULL PRIMARY KEY,
+            document_id varchar NOT NULL REFERENCES documents (id),
+            chunk_index integer NOT NULL,
+            text text NOT NULL,
+            embedding vector(384),
+            content_hash varchar(64),
+            text_search tsvector GENERATED ALWAYS AS (to_tsvector('english', text)) STORED,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    columns = "id, document_id, chunk_index, text, embedding, content_hash, created_at"
+    op.execute(f"INSERT INTO chunks ({columns}) SELECT {columns} FROM chunks_partitioned")
+    op.execute("DROP TABLE chunks_partitioned")  # drops the partitions with it
+    op.execute("CREATE INDEX ix_chunks_document_id ON chunks (document_id)")
+    op.execute("CREATE INDEX ix_chunks_content_hash ON chunks (content_hash)")
+    m = int(settings.VECTOR_HNSW_M)
+    ef_construction = int(settings.VECTOR_HNSW_EF_CONSTRUCTION)
+    op.execute(
+        "CREATE INDEX ix_chunks_embedding ON chunks "
+        f"USING hnsw (embedding vector_cosine_ops) WITH (m = {m}, ef_construction = {ef_construction})"
+    )
+    op.execute("CREATE INDEX ix_chunks_text_search ON chunks USING gin (text_search)")
@@ -0,0 +1,67 @@
+"""embedding_storage_and_binary_index
+
+Revision ID: 011_embedding_storage_and_binary_index
+Revises: 010_partition_chunks_by_workspace
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from apps.api.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_embedding_storage_and_binary_index'
+down_revision: Union[str, None] = '010_partition_chunks_by_workspace'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Needs pgvector 0.7+ on the server (halfvec, bit, binary_quantize)
+
+
+def _create_embedding_index(storage: str) -> None:
+    m = int(settings.VECTOR_HNSW_M)
+    ef_construction = int(settings.VECTOR_HNSW_EF_CONSTRUCTION)
+    op.execute(
+        "CREATE INDEX ix_chunks_embedding ON chunks "
+        f"USING hnsw (embedding {storage}_cosine_ops) WITH (m = {m}, ef_construction = {ef_construction})"
+    )
+
+
+def upgrade() -> None:
+    storage = settings.VECTOR_STORAGE
+    if storage not in ("vector", "halfvec"):
+        raise ValueError(f"Unsupported VECTOR_STORAGE: {storage}")
+
+    if storage == "halfvec":
+        # float16 halves the column and the HNSW index; the index is rebuilt
+        # after the rewrite rather than maintained through it
+        op.execute("DROP INDEX IF EXISTS ix_chunks_embedding")
+        op.execute("ALTER TABLE chunks ALTER COLUMN embedding TYPE halfvec(384) USING embedding::halfvec(384)")
+        _create_embedding_index(storage)
+
+    # Expression index over the sign bits of each embedding (48 bytes per row) for
+    # the coarse Hamming pass of VECTOR_BINARY_RERANK, built only when the re-rank is
+    # on: otherwise every deployment would pay its storage and insert cost for
+    # nothing. No column is stored for it; queries repeat the expression. Per
+    # partition, so not CONCURRENTLY.
+    if settings.VECTOR_BINARY_RERANK:
+        op.execute(
+            "CREATE INDEX ix_chunks_embedding_bit ON chunks "
+            "USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops) "
+            f"WITH (m = {int(settings.VECTOR_HNSW_M)}, ef_construction = {int(settings.VECTOR_HNSW_EF_CONSTRUCTION)})"
+        )
+
+
+def downgrade() -> None:
+    # Whether or not upgrade built it
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_bit")
+
+    if settings.VECTOR_STORAGE == "halfvec":
+        # Back to float32; with vector storage upgrade left the column and its
+        # index alone, so there is nothing to rebuild
+        op.execute("DROP INDEX IF EXISTS ix_chunks_embedding")
+        op.execute("ALTER TABLE chunks ALTER COLUMN embedding TYPE vector(384) USING embedding::vector(384)")
+        _create_embedding_index("vector")
@@ -35,7 +35,7 @@ class Settings(BaseSettings):
             username=values.get("POSTGRES_USER"),
             password=values.get("POSTGRES_PASSWORD"),
             host=values.get("POSTGRES_SERVER"),
-            port=values.get("POSTGRES_PORT"),
+            port=int(values.get("POSTGRES_PORT") or 5432),
             path=f"{values.get('POSTGRES_DB') or ''}",
         )
 
@@ -57,6 +57,130 @@ class Settings(BaseSettings):
             return v
         return f"redis://{values.get('REDIS_HOST')}:{values.get('REDIS_PORT')}/0"
 
+    # Embeddings
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    # Inference backend: torch (sentence-transformers) or onnx (ONNX Runtime, CPU)
+    EMBEDDING_BACKEND: str = "torch"
+    # ONNX only: use the int8 dynamically quantized export, and where exports are kept
+    EMBEDDING_ONNX_QUANTIZE: bool = True
+    EMBEDDING_ONNX_DIR: str = "/app/cache/onnx"
+    # ONNX Runtime intra-op threads (0 = runtime default)
+    EMBEDDING_ONNX_THREADS: int = 0
+    # Load the model in the background at API startup; /ready reports 503 until the
+    # first successful encode. Failed warm-ups (an embedding server still loading)
+    # are retried with backoff doubling up to EMBEDDING_WARMUP_MAX_BACKOFF seconds.
+    EMBEDDING_WARMUP: bool = True
+    EMBEDDING_WARMUP_MAX_BACKOFF: float = 30.0
+    # Sentences per forward pass inside model.encode
+    EMBEDDING_BATCH_SIZE: int = 64
+    # Chunks buffered across documents before they are embedded together
+    INGEST_EMBED_BATCH_SIZE: int = 512
+    # Redis embedding cache TTL in seconds
+    EMBEDDING_CACHE_TTL: int = 86400
+    # In-process LRU in front of Redis (0 entries disables it)
+    EMBEDDING_LRU_MAX_ENTRIES: int = 10000
+    EMBEDDING_LRU_MAX_BYTES: int = 32 * 1024 * 1024
+    EMBEDDING_LRU_TTL: int = 3600
+    # Optional standalone embedding server (apps/api/embedding_server.py). When a URL
+    # or Unix socket is set, cache misses are encoded there instead of in-process.
+    EMBEDDING_SERVER_URL: Optional[str] = None
+    EMBEDDING_SERVER_UDS: Optional[str] = None
+    EMBEDDING_SERVER_TIMEOUT: float = 60.0
+    # Server side: texts merged into one forward pass, and how long to wait for them
+    EMBEDDING_SERVER_MAX_BATCH: int = 256
+    EMBEDDING_SERVER_MAX_WAIT_MS: float = 5.0
+
+    # Ingestion
+    # Chunking strategy: char (CHUNK_SIZE/CHUNK_OVERLAP characters), or sentence / token,
+    # which cut to at most CHUNK_MAX_TOKENS tokens of the embedding model's tokenizer
+    # (MiniLM truncates anything past 256). CHUNK_OVERLAP_TOKENS applies to both; the
+    # sentence strategy carries whole trailing sentences within it. The chunking
+    # settings are part of each source's fingerprint, so changing any of them
+    # re-chunks documents on their next refresh (unchanged chunk texts keep their
+    # embeddings).
+    CHUNK_STRATEGY: str = "char"
+    CHUNK_SIZE: int = 800
+    CHUNK_OVERLAP: int = 100
+    CHUNK_MAX_TOKENS: int = 256
+    CHUNK_OVERLAP_TOKENS: int = 32
+    # How chunk rows are written: copy (asyncpg binary COPY), insert (multi-row INSERT) or orm
+    CHUNK_WRITE_METHOD: str = "copy"
+    # Rows read per pandas chunk when streaming CSV uploads
+    CSV_CHUNK_ROWS: int = 5000
+    # Max subtasks a workspace ingestion fans out to
+    INGEST_MAX_PARALLEL_TASKS: int = 8
+    # Sources processed concurrently inside a subtask (each holds one DB session)
+    INGEST_SOURCE_WORKERS: int = 4
+    # Chunk batches allowed to wait for the shared embed stage before workers block,
+    # and how long the stage waits to merge batches from different sources
+    INGEST_EMBED_QUEUE: int = 4
+    INGEST_EMBED_MAX_WAIT_MS: float = 20.0
+    # PDF extraction processes started by each Celery worker process (0 = one per
+    # CPU), and pages handed to each task
+    PDF_EXTRACT_WORKERS: int = 0
+    PDF_PAGES_PER_TASK: int = 8
+    # Max sources accepted by one POST /sources/bulk request
+    BULK_SOURCES_MAX_ITEMS: int = 50000
+
+    # Uploads
+    UPLOAD_DIR: str = "/app/uploads"
+    # Larger uploads are rejected with 413
+    UPLOAD_MAX_BYTES: int = 1024 * 1024 * 1024
+    # Bytes read, hashed and written per step while streaming an upload to disk
+    UPLOAD_BLOCK_BYTES: int = 1024 * 1024
+
+    # Vector search
+    # HNSW build parameters used by migration 008 (graph degree and build-time candidate list)
+    VECTOR_HNSW_M: int = 16
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    # Default per-query search effort: hnsw.ef_search, or ivfflat.probes on an ivfflat
+    # index. None keeps the server setting; requests can override both.
+    VECTOR_EF_SEARCH: Optional[int] = None
+    VECTOR_IVFFLAT_PROBES: Optional[int] = None
+    # Hash partitions of chunks by workspace (migration 010). Each partition has its
+    # own HNSW graph, so a search only walks the graph shared by ~1/N of the workspaces.
+    VECTOR_PARTITIONS: int = 64
+    # hnsw.iterative_scan (strict_order or relaxed_order; needs pgvector >= 0.8, as in
+    # the pgvector/pgvector:pg16 image): keeps scanning until `limit` rows pass the
+    # workspace filter. A partition's graph is shared by many workspaces, so without
+    # it a scan returns ef_search candidates and the filter can leave results short.
+    # relaxed_order is safe here because every search re-sorts by distance. None
+    # disables it (older pgvector).
+    VECTOR_ITERATIVE_SCAN: Optional[str] = "relaxed_order"
+    # Hybrid search: candidates taken from each of the full-text and vector sides,
+    # and the reciprocal rank fusion constant (score = sum of 1 / (k + rank))
+    SEARCH_HYBRID_CANDIDATES: int = 50
+    SEARCH_RRF_K: int = 60
+    # Storage of chunks.embedding: vector (float32) or halfvec (float16: half the table
+    # and index size). Applied by migration 011; changing it means downgrading and
+    # upgrading 011 again.
+    VECTOR_STORAGE: str = "vector"
+    # Coarse pass over the binary-quantized Hamming index (migration 011) for this many
+    # candidates, re-ranked by exact cosine distance. Off: the HNSW index is used directly.
+    # Migration 011 only builds the Hamming index when this is on, so like
+    # VECTOR_STORAGE, turning it on later means downgrading and upgrading 011 again.
+    VECTOR_BINARY_RERANK: bool = False
+    VECTOR_BINARY_CANDIDATES: int = 200
+    # Workspaces with at most this many chunks are searched exactly in memory from a
+    # float32 snapshot rebuilt after each ingestion (0 disables); larger ones use pgvector
+    VECTOR_MEMORY_MAX_CHUNKS: int = 200_000
+    VECTOR_SNAPSHOT_DIR: str = "/app/cache/vectors"
+    # Snapshots kept memory-mapped per API process
+    VECTOR_MEMORY_MAX_WORKSPACES: int = 256
+    # Most results one search query may ask for
+    SEARCH_MAX_LIMIT: int = 100
+    # Most queries accepted by one POST /workspaces/{id}/search/batch
+    SEARCH_BATCH_MAX_QUERIES: int = 100
+    # Redis search-result cache TTL in seconds (0 disables). Entries are also
+    # invalidated as soon as ingestion changes the workspace.
+    SEARCH_CACHE_TTL: int = 600
+
+    # URL fetching
+    HTTP_CACHE_DIR: str = "/app/cache/http"
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_PER_HOST: int = 4
+    HTTP_TIMEOUT: float = 10.0
+
     model_config = SettingsConfigDict(case_sensitive=True, env_file=".env")
 
 settings = Settings()
@@ -1,5 +1,10 @@
+import hashlib
 import re
-from typing import List
+from typing import Iterator, List, Tuple
+
+def content_hash(text: str) -> str:
+    # Content address of a chunk: identical text shares one embedding
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 def clean_text(text: str) -> str:
     if not text:
@@ -9,29 +14,143 @@ def clean_text(text: str) -> str:
     return text
 
 def chunk_text(text: str, size: int = 800, overlap: int = 100) -> List[str]:
+    return list(iter_char_chunks(text, size, overlap))
+
+def iter_char_chunks(text: str, size: int = 800, overlap: int = 100) -> Iterator[str]:
     if not text:
-        return []
-    
-    chunks = []
+        return
+
     start = 0
     text_len = len(text)
-    
+
     while start < text_len:
         end = min(start + size, text_len)
-        chunk = text[start:end]
-        
+
         # If we are not at the end, try to break at a space to avoid splitting words
         if end < text_len:
-            last_space = chunk.rfind(' ')
-            if last_space > size * 0.5: # Only truncate if space is somewhat near the end
-                end = start + last_space
-                chunk = text[start:end]
-        
-        chunks.append(chunk)
+            last_space = text.rfind(' ', start, end)
+            if last_space - start > size * 0.5: # Only truncate if space is somewhat near the end
+                end = last_space
+
+        yield text[start:end]
         start += size - overlap
-        
+
         # Prevent infinite loops if progress isn't made (e.g. huge word)
         if start >= end:
             start = end
-            
-    return chunks
+
+def iter_token_chunks(text: str, tokenizer, max_tokens: int = 256, overlap: int = 32, window: int = 65536) -> Iterator[str]:
+    # Chunks of at most max_tokens model tokens (special tokens included), cut on
+    # token boundaries via the fast tokenizer's offset mapping. Each chunk is a slice
+    # of the original text. The text is tokenized window characters at a time, so
+    # very large inputs are never tokenized in one go.
+    if not text:
+        return
+
+    budget = max_tokens - tokenizer.num_special_tokens_to_add()
+    overlap = min(overlap, budget - 1)
+    pos = 0
+    text_len = len(text)
+
+    while pos < text_len:
+        end = min(pos + window, text_len)
+        if end < text_len:
+            last_space = text.rfind(' ', pos, end)
+            if last_space > pos:
+                end = last_space
+
+        offsets = tokenizer(text[pos:end], add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        if not offsets:
+            pos = end
+            continue
+
+        first = 0
+        while True:
+            last = min(first + budget, len(offsets))
+            if last == len(offsets) and end < text_len and first > 0:
+                # Too few tokens left for a full chunk; continue them in the next window
+                break
+            yield text[pos + offsets[first][0]:pos + offsets[last - 1][1]]
+            if last == len(offsets):
+                break
+            first = last - overlap
+
+        if last == len(offsets) and (end == text_len or first == 0):
+            pos = end
+        else:
+            pos += offsets[first][0]
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def iter_sentences(text: str) -> Iterator[str]:
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    if start < len(text):
+        yield text[start:]
+
+def iter_sentence_chunks(text: str, tokenizer=None, max_tokens: int = 256, size: int = 800, overlap: int = 0) -> Iterator[str]:
+    # Packs whole sentences into chunks. The budget is max_tokens model tokens when a
+    # tokenizer is given, otherwise size characters. overlap is measured the same way:
+    # the trailing whole sentences that fit in it are repeated at the start of the
+    # next chunk. Sentences that exceed the budget on their own are split with the
+    # token or character chunker.
+    if tokenizer is not None:
+        budget = max_tokens - tokenizer.num_special_tokens_to_add()
+        measure = lambda s: len(tokenizer(s, add_special_tokens=False)["input_ids"])
+        split = lambda s: iter_token_chunks(s, tokenizer, max_tokens)
+    else:
+        budget = size
+        measure = len
+        split = lambda s: iter_char_chunks(s, size, 0)
+
+    # Joining with a space may add a token or character per sentence; count it
+    current: List[Tuple[str, int]] = []
+    used = 0
+    for sentence in iter_sentences(text):
+        length = measure(sentence)
+        if length > budget:
+            if current:
+                yield ' '.join(s for s, _ in current)
+                current, used = [], 0
+            yield from split(sentence)
+            continue
+        if current and used + length + 1 > budget:
+            yield ' '.join(s for s, _ in current)
+            carried: List[Tuple[str, int]] = []
+            used = 0
+            for carried_sentence, n in reversed(current):
+                if used + n + 1 > overlap:
+                    break
+                carried.insert(0, (carried_sentence, n))
+                used += n + 1
+            current = carried
+            # Drop carried sentences that would not leave room for this one
+            while current and used + length + 1 > budget:
+                used -= current.pop(0)[1] + 1
+        current.append((sentence, length))
+        used += length + 1
+
+    if current:
+        yield ' '.join(s for s, _ in current)
+
+def iter_chunks(
+    text: str,
+    strategy: str = "char",
+    size: int = 800,
+    overlap: int = 100,
+    tokenizer=None,
+    max_tokens: int = 256,
+    overlap_tokens: int = 32,
+) -> Iterator[str]:
+    # Lazily yields chunks using the given strategy: char, sentence or token.
+    # sentence and token budgets are in model tokens and need the model's tokenizer.
+    if strategy == "token":
+        return iter_token_chunks(text, tokenizer, max_tokens, overlap_tokens)
+    if strategy == "sentence":
+        # Overlap in tokens with a tokenizer, like the budget; otherwise in characters
+        return iter_sentence_chunks(
+            text, tokenizer, max_tokens, size, overlap_tokens if tokenizer is not None else overlap
+        )
+    return iter_char_chunks(text, size, overlap)
@@ -1,12 +1,28 @@
 from datetime import datetime
 from typing import Optional, List, Any
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, JSON, func, ARRAY, Float
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, JSON, func, ARRAY, Float, Computed
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import JSONB, ARRAY, UUID
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY, UUID, TSVECTOR
+from pgvector.sqlalchemy import HALFVEC, Vector
+import numpy as np
 import uuid
+from apps.api.core.config import settings
 from apps.api.db.base import Base
 
+# chunks.embedding is float32 vector or float16 halfvec depending on
+# VECTOR_STORAGE, which has to match what migration 011 converted the column to
+EMBEDDING_DIM = 384
+EmbeddingType = HALFVEC if settings.VECTOR_STORAGE == "halfvec" else Vector
+
+def embedding_array(value: Any) -> np.ndarray:
+    # float32 array of a loaded embedding; halfvec values load as HalfVector objects
+    if hasattr(value, "to_numpy"):
+        value = value.to_numpy()
+    return np.asarray(value, dtype=np.float32)
+
+# Text search configuration behind chunks.text_search; queries must use the same one
+TEXT_SEARCH_CONFIG = "english"
+
 def generate_uuid():
     return str(uuid.uuid4())
 
@@ -15,6 +31,7 @@ class Workspace(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=generate_uuid)
     name: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, default="idle", nullable=False) # idle, processing, completed, completed_with_errors
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -35,6 +52,8 @@ class Source(Base):
     raw_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String, default="pending", nullable=False)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    fingerprint: Mapped[Optional[str]] = mapped_column(String, nullable=True) # content hash at last successful ingest
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True) # sha256 of the uploaded file
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     workspace: Mapped["Workspace"] = relationship(back_populates="sources")
@@ -48,6 +67,7 @@ class Document(Base):
     source_id: Mapped[str] = mapped_column(ForeignKey("sources.id"), nullable=False, index=True)
     doc_type: Mapped[str] = mapped_column(String, nullable=False) # review, page, report
     metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONB, nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True) # sha256 of metadata + cleaned text
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     source: Mapped["Source"] = relationship(back_populates="documents")
@@ -59,9 +79,17 @@ class Chunk(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=generate_uuid)
     document_id: Mapped[str] = mapped_column(ForeignKey("documents.id"), nullable=False, index=True)
+    # Denormalized from the document's source. chunks is hash-partitioned on it
+    # (migration 010; the table's key is (id, workspace_id)).
+    workspace_id: Mapped[str] = mapped_column(ForeignKey("workspaces.id"), nullable=False, index=True)
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     text: Mapped[str] = mapped_column(Text, nullable=False)
-    embedding: Mapped[Optional[Any]] = mapped_column(Vector(384))
+    embedding: Mapped[Optional[Any]] = mapped_column(EmbeddingType(EMBEDDING_DIM))
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True) # sha256 of text
+    # Maintained by Postgres from text (GIN indexed); never loaded with the row
+    text_search: Mapped[Optional[Any]] = mapped_column(
+        TSVECTOR, Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', text)", persisted=True), deferred=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     document: Mapped["Document"] = relationship(back_populates="chunks")
@@ -105,3 +133,23 @@ class ScorecardResult(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     scorecard: Mapped["Scorecard"] = relationship(back_populates="results")
+
+
+class IngestionRun(Base):
+    __tablename__ = "ingestion_runs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=generate_uuid)
+    source_id: Mapped[str] = mapped_column(ForeignKey("sources.id"), nullable=False, index=True)
+    workspace_id: Mapped[str] = mapped_column(ForeignKey("workspaces.id"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String, nullable=False) # completed, unchanged, copied, failed
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    timings: Mapped[dict] = mapped_column(JSONB, nullable=False) # stage -> milliseconds
+    bytes_in: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    documents: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chunks_written: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chunks_embedded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chunks_reused: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cache: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True) # embedding cache tiers for this run
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
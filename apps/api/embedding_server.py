@@ -0,0 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import numpy as np
+from fastapi import FastAPI, Response
+from pydantic import BaseModel
+
+from apps.api.core.config import settings
+from apps.api.services.batching import MicroBatcher
+
+# Standalone embedding service. One process holds the model; API and Celery workers
+# reach it with EMBEDDING_SERVER_URL (or EMBEDDING_SERVER_UDS) set.
+#
+#   uvicorn apps.api.embedding_server:app --host 0.0.0.0 --port 8001
+#   uvicorn apps.api.embedding_server:app --uds /tmp/insighthub-embedder.sock
+
+def _encode(texts: List[str]) -> np.ndarray:
+    # Always the local model, regardless of EMBEDDING_SERVER_URL
+    from apps.api.services.embeddings import get_model
+    return np.asarray(get_model().encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE), dtype="<f4")
+
+batcher: Optional[MicroBatcher] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global batcher
+    # Load the model before accepting traffic
+    await asyncio.to_thread(_encode, ["warm up"])
+    batcher = MicroBatcher(
+        _encode,
+        max_batch_size=settings.EMBEDDING_SERVER_MAX_BATCH,
+        max_wait=settings.EMBEDDING_SERVER_MAX_WAIT_MS / 1000,
+    )
+    batcher.start()
+    yield
+    await batcher.stop()
+
+app = FastAPI(title="InsightHub Embedding Server", lifespan=lifespan)
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+@app.post("/embed")
+async def embed(request: EmbedRequest):
+    # Packed little-endian float32 rows, shape given by the X-Embedding-Dim header
+    vectors = await batcher.submit(request.texts) if request.texts else np.zeros((0, 0), dtype="<f4")
+    return Response(
+        content=vectors.tobytes(),
+        media_type="application/octet-stream",
+        headers={"X-Embedding-Dim": str(vectors.shape[1])},
+    )
+
+@app.get("/health")
+def health_check():
+    return {"status": "ok", "model": settings.EMBEDDING_MODEL_NAME, "batching": batcher.stats() if batcher else None}
@@ -1,13 +1,41 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from apps.api.core.config import settings
 from apps.api.worker import celery_app
 from apps.api.routers import workspaces, sources, search, scorecards, export
+from apps.api.services import embeddings
+
+logger = logging.getLogger(__name__)
+
+async def _warm_up_embeddings():
+    # The embedding server may still be loading its model when the API starts, so
+    # failures are retried until one encode succeeds; /ready stays 503 meanwhile
+    delay = 1.0
+    while not embeddings.is_ready():
+        try:
+            await asyncio.to_thread(embeddings.warm_up)
+        except Exception:
+            logger.warning("Embedding warm-up failed, retrying in %.0fs", delay, exc_info=True)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.EMBEDDING_WARMUP_MAX_BACKOFF)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the process starts serving /health immediately;
+    # load balancers should route traffic on /ready instead
+    task = asyncio.create_task(_warm_up_embeddings()) if settings.EMBEDDING_WARMUP else None
+    yield
+    if task:
+        task.cancel()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 if settings.BACKEND_CORS_ORIGINS:
@@ -41,6 +69,19 @@ def health_check():
         "celery_broker": settings.CELERY_BROKER_URL is not None
     }
 
+@app.get("/ready")
+def readiness_check():
+    ready = embeddings.is_ready() or not settings.EMBEDDING_WARMUP
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "warming_up"},
+    )
+
+@app.get("/metrics/embeddings")
+def embedding_metrics():
+    # Per-process embedding cache counters
+    return embeddings.get_cache_stats()
+
 # Example Celery task trigger
 @app.post("/test-celery")
 def trigger_test_celery(word: str):
@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
+from apps.api.core.config import settings
 from apps.api.db.session import get_db
 from apps.api.db import models
-from apps.api.services.embeddings import get_embedding
+from apps.api.services.embeddings import get_embedding, get_embeddings
+from apps.api.services.vector_snapshot import WorkspaceVectorIndex, get_index
+from apps.api.services.search import (
+    MAX_EF_SEARCH,
+    batch_vector_search_stmt,
+    chunk_hits_stmt,
+    hybrid_candidates,
+    hybrid_search_stmt,
+    search_cache,
+    set_search_effort,
+    vector_search_stmt,
+)
 
 router = APIRouter(
     prefix="/workspaces",
@@ -18,61 +30,155 @@ class SearchResult(BaseModel):
     source_title: str
     source_url: Optional[str] = None
     document_type: str
+    # Cosine similarity, or the rank fusion score in hybrid mode
     score: float
 
 class SearchResponse(BaseModel):
     results: List[SearchResult]
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=settings.SEARCH_BATCH_MAX_QUERIES)
+    limit: int = Field(5, ge=1, le=settings.SEARCH_MAX_LIMIT)
+    filters: Optional[dict] = None
+    ef_search: Optional[int] = Field(None, ge=1, le=MAX_EF_SEARCH)
+    probes: Optional[int] = Field(None, ge=1)
+
+class QueryResults(BaseModel):
+    query: str
+    results: List[SearchResult]
+
+class BatchSearchResponse(BaseModel):
+    # One entry per query, in request order
+    results: List[QueryResults]
+
+def _cache_params(query: str, limit: int, filters: Optional[dict], mode: str, ef_search: Optional[int], probes: Optional[int]) -> dict:
+    return {"query": query, "limit": limit, "filters": filters, "mode": mode, "ef_search": ef_search, "probes": probes}
+
+def _search_result(chunk: models.Chunk, doc: models.Document, source: models.Source, score: float) -> SearchResult:
+    return SearchResult(
+        chunk_text=chunk.text,
+        source_title=source.title,
+        source_url=source.url,
+        document_type=doc.doc_type,
+        score=score
+    )
+
+async def _search_in_memory(
+    db: AsyncSession, index: WorkspaceVectorIndex, workspace_id: str, query_embeddings: List[List[float]], limit: int
+) -> List[List[SearchResult]]:
+    # Exact top-k from the workspace's snapshot; Postgres only fetches the winners
+    hits = await asyncio.to_thread(index.search, query_embeddings, limit)
+    chunk_ids = list({chunk_id for query_hits in hits for chunk_id, _ in query_hits})
+    result = await db.execute(chunk_hits_stmt(workspace_id, chunk_ids))
+    rows = {chunk.id: (chunk, doc, source) for chunk, doc, source in result.all()}
+    return [
+        [_search_result(*rows[chunk_id], score) for chunk_id, score in query_hits if chunk_id in rows]
+        for query_hits in hits
+    ]
+
 @router.post("/{workspace_id}/search", response_model=SearchResponse)
 async def search_workspace(
     workspace_id: str, 
     query: str, 
-    limit: int = 5, 
+    limit: int = Query(5, ge=1, le=settings.SEARCH_MAX_LIMIT),
     filters: Optional[dict] = None, 
+    # hybrid adds full-text matches (exact product names, SKUs) fused by rank
+    mode: Literal["vector", "hybrid"] = "vector",
+    # Higher values search more of the index: better recall, slower queries
+    ef_search: Optional[int] = Query(None, ge=1, le=MAX_EF_SEARCH),
+    probes: Optional[int] = Query(None, ge=1),
     db: AsyncSession = Depends(get_db)
 ):
+    # Hot queries are answered from Redis without touching Postgres or the model.
+    # Only searches of an existing workspace are ever cached. The cache client is
+    # synchronous, so its round trips run in a thread like the other blocking calls.
+    cache_params = _cache_params(query, limit, filters, mode, ef_search, probes)
+    cached, generation = await asyncio.to_thread(search_cache.get, workspace_id, cache_params)
+    if cached is not None:
+        return SearchResponse(results=cached)
+
     # Verify workspace
     workspace = await db.get(models.Workspace, workspace_id)
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
 
-    # Generate query embedding
-    query_embedding = get_embedding(query)
+    # Generate query embedding; the encoder call blocks, so it runs off the event loop
+    query_embedding = await asyncio.to_thread(get_embedding, query)
 
-    # Base query
-    stmt = (
-        select(models.Chunk, models.Document, models.Source, models.Chunk.embedding.cosine_distance(query_embedding).label("distance"))
-        .join(models.Document, models.Chunk.document_id == models.Document.id)
-        .join(models.Source, models.Document.source_id == models.Source.id)
-        .where(models.Source.workspace_id == workspace_id)
-    )
+    # Small workspaces with a current snapshot are searched exactly in memory;
+    # metadata filters and hybrid mode need Postgres. Looking the snapshot up reads
+    # Redis and may map files, so it runs off the event loop.
+    index = await asyncio.to_thread(get_index, workspace_id) if mode == "vector" and not filters else None
+    if index is not None:
+        search_results = (await _search_in_memory(db, index, workspace_id, [query_embedding], limit))[0]
+    else:
+        if mode == "hybrid":
+            stmt = hybrid_search_stmt(workspace_id, query, query_embedding, limit, filters)
+            neighbours = hybrid_candidates(limit)
+        else:
+            stmt = vector_search_stmt(workspace_id, query_embedding, limit, filters)
+            neighbours = limit
+
+        # The workspace lookup above already opened the transaction these apply to
+        await set_search_effort(db, ef_search, probes, neighbours)
+        result = await db.execute(stmt)
+        rows = result.all()
 
-    # Apply Metadata Filters
-    # filters example: {"brand": "BrandA", "source_type": "url"}
-    # Note: Document metadata is JSONB, so we can filter inside it for brands etc.
-    if filters:
-        for key, value in filters.items():
-            if key == "brand":
-                # JSONB containment or specific key check
-                stmt = stmt.where(models.Document.metadata_['brand'].astext == value)
-            # Add other filters as needed
-
-    stmt = stmt.order_by(models.Chunk.embedding.cosine_distance(query_embedding)).limit(limit)
-    
-    result = await db.execute(stmt)
-    rows = result.all()
-    
-    search_results = []
-    for chunk, doc, source, distance in rows:
-        # Distance is cosine distance (0 to 2), similarity is 1 - distance
-        score = 1 - distance
-        
-        search_results.append(SearchResult(
-            chunk_text=chunk.text,
-            source_title=source.title,
-            source_url=source.url,
-            document_type=doc.doc_type,
-            score=score
-        ))
+        search_results = [_search_result(chunk, doc, source, score) for chunk, doc, source, score in rows]
 
+    await asyncio.to_thread(
+        search_cache.set, workspace_id, cache_params, generation, [r.model_dump() for r in search_results]
+    )
     return SearchResponse(results=search_results)
+
+@router.post("/{workspace_id}/search/batch", response_model=BatchSearchResponse)
+async def search_workspace_batch(
+    workspace_id: str,
+    request: BatchSearchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    # Many vector searches for one page load: cached queries are answered from one
+    # Redis MGET, the rest embedded in one encoder call and searched in one SQL
+    # statement. Entries are shared with the single-query endpoint.
+    params = [
+        _cache_params(query, request.limit, request.filters, "vector", request.ef_search, request.probes)
+        for query in request.queries
+    ]
+    results, generation = await asyncio.to_thread(search_cache.get_many, workspace_id, params)
+    misses = [i for i, cached in enumerate(results) if cached is None]
+
+    if misses:
+        # Verify workspace
+        workspace = await db.get(models.Workspace, workspace_id)
+        if not workspace:
+            raise HTTPException(status_code=404, detail="Workspace not found")
+
+        embeddings = await asyncio.to_thread(get_embeddings, [request.queries[i] for i in misses])
+
+        index = await asyncio.to_thread(get_index, workspace_id) if not request.filters else None
+        if index is not None:
+            # One matrix multiply for every query
+            found = dict(zip(misses, await _search_in_memory(db, index, workspace_id, embeddings, request.limit)))
+        else:
+            stmt = batch_vector_search_stmt(workspace_id, embeddings, request.limit, request.filters)
+
+            await set_search_effort(db, request.ef_search, request.probes, request.limit)
+            result = await db.execute(stmt)
+
+            found = {i: [] for i in misses}
+            for position, chunk, doc, source, score in result.all():
+                found[misses[position - 1]].append(_search_result(chunk, doc, source, score))
+
+        await asyncio.to_thread(
+            search_cache.set_many,
+            workspace_id,
+            [(params[i], [r.model_dump() for r in found[i]]) for i in misses],
+            generation,
+        )
+        for i in misses:
+            results[i] = found[i]
+
+    return BatchSearchResponse(results=[
+        QueryResults(query=query, results=query_results)
+        for query, query_results in zip(request.queries, results)
+    ])
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-import shutil
+from sqlalchemy import select, text
+from pydantic import TypeAdapter, ValidationError
+from typing import List
+import json
 import os
 
+from apps.api.core.config import settings
 from apps.api.db.session import get_db
 from apps.api.db import models
 from apps.api import schemas
+from apps.api.services.uploads import InvalidUploadError, UploadTooLargeError, receive_upload
+from apps.api.worker import celery_app
 
 router = APIRouter(
     prefix="/sources",
@@ -48,36 +53,139 @@ async def add_note_source(source: schemas.SourceCreateNote, workspace_id: str, d
     await db.refresh(new_source)
     return new_source
 
-@router.post("/upload", response_model=schemas.SourceResponse, status_code=status.HTTP_201_CREATED)
-async def upload_file_source(
-    workspace_id: str = Form(...),
-    title: str = Form(...),
-    file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
-):
-    workspace = await db.get(models.Workspace, workspace_id)
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Save file locally (in production, use S3/Blob storage)
-    upload_dir = "/app/uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    file_path = os.path.join(upload_dir, f"{workspace_id}_{file.filename}")
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+# The body is parsed by receive_upload rather than declared as File/Form parameters:
+# those are fully spooled to a temporary file before the handler runs, which would
+# put the size limit after the whole body had already been received.
+_UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["workspace_id", "title", "file"],
+                    "properties": {
+                        "workspace_id": {"type": "string"},
+                        "title": {"type": "string"},
+                        "file": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+@router.post(
+    "/upload", response_model=schemas.SourceResponse, status_code=status.HTTP_201_CREATED, openapi_extra=_UPLOAD_FORM
+)
+async def upload_file_source(request: Request, db: AsyncSession = Depends(get_db)):
+    content_length = request.headers.get("content-length", "")
+    try:
+        received = await receive_upload(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            settings.UPLOAD_DIR,
+            content_length=int(content_length) if content_length.isdigit() else None,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    source_type = "pdf" if file.filename.endswith(".pdf") else "csv" if file.filename.endswith(".csv") else "file"
+    try:
+        workspace_id = received.fields.get("workspace_id")
+        title = received.fields.get("title")
+        if not workspace_id or not title:
+            raise HTTPException(status_code=422, detail="workspace_id and title are required")
+        workspace = await db.get(models.Workspace, workspace_id)
+        if not workspace:
+            raise HTTPException(status_code=404, detail="Workspace not found")
+
+        # Save file locally (in production, use S3/Blob storage). The path carries the
+        # source id so a later upload with the same name never replaces this file.
+        filename = received.filename
+        source_id = models.generate_uuid()
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{workspace_id}_{source_id}_{os.path.basename(filename)}")
+        os.replace(received.file.path, file_path)
+    except BaseException:
+        if os.path.exists(received.file.path):
+            os.unlink(received.file.path)
+        raise
+
+    source_type = "pdf" if filename.endswith(".pdf") else "csv" if filename.endswith(".csv") else "file"
 
     new_source = models.Source(
+        id=source_id,
         workspace_id=workspace_id,
         type=source_type,
         title=title,
-        filename=file.filename,
+        filename=filename,
         # In a real app we'd store the path or S3 key
-        raw_text=f"loc:{file_path}" 
+        raw_text=f"loc:{file_path}",
+        content_hash=received.file.content_hash,
     )
     db.add(new_source)
     await db.commit()
     await db.refresh(new_source)
     return new_source
+
+_bulk_items = TypeAdapter(List[schemas.BulkSourceItem])
+
+def _parse_bulk_body(body: bytes) -> List[schemas.BulkSourceItem]:
+    # A JSON array, or NDJSON (one source object per line)
+    stripped = body.strip()
+    try:
+        if stripped.startswith(b"["):
+            raw = json.loads(stripped)
+        else:
+            raw = [json.loads(line) for line in stripped.splitlines() if line.strip()]
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+
+    if len(raw) > settings.BULK_SOURCES_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_SOURCES_MAX_ITEMS} sources per request",
+        )
+
+    # One validation pass over the whole batch; errors are located by item index
+    try:
+        return _bulk_items.validate_python(raw)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+# One statement for the whole batch regardless of its size: columns are bound as
+# arrays and expanded with unnest, so the parameter count stays fixed
+BULK_INSERT_SOURCES_SQL = text("""
+    INSERT INTO sources (id, workspace_id, type, title, url, raw_text, status)
+    SELECT id, :workspace_id, type, title, url, raw_text, 'pending'
+    FROM unnest(
+        CAST(:ids AS text[]), CAST(:types AS text[]), CAST(:titles AS text[]),
+        CAST(:urls AS text[]), CAST(:raw_texts AS text[])
+    ) AS t(id, type, title, url, raw_text)
+""")
+
+@router.post("/bulk", response_model=schemas.BulkSourceResponse, status_code=status.HTTP_201_CREATED)
+async def add_sources_bulk(request: Request, workspace_id: str, ingest: bool = False, db: AsyncSession = Depends(get_db)):
+    workspace = await db.get(models.Workspace, workspace_id)
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+
+    items = _parse_bulk_body(await request.body())
+    ids = [models.generate_uuid() for _ in items]
+    if items:
+        await db.execute(BULK_INSERT_SOURCES_SQL, {
+            "workspace_id": workspace_id,
+            "ids": ids,
+            "types": [item.type for item in items],
+            "titles": [item.title for item in items],
+            "urls": [str(item.url) if item.type == "url" else None for item in items],
+            "raw_texts": [item.raw_text if item.type == "note" else None for item in items],
+        })
+        await db.commit()
+
+    task_id = None
+    if ingest and items:
+        task = celery_app.send_task("apps.api.worker.process_workspace_sources", args=[workspace_id, False])
+        task_id = task.id
+    return {"created": len(items), "ids": ids, "task_id": task_id}
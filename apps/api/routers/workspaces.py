@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, text
+from typing import List, Optional
 
 from apps.api.db.session import get_db
 from apps.api.db import models
@@ -39,13 +39,13 @@ async def get_workspace_sources(workspace_id: str, db: AsyncSession = Depends(ge
     return sources
 
 @router.post("/{workspace_id}/ingest", response_model=schemas.IngestResponse)
-async def ingest_workspace(workspace_id: str, db: AsyncSession = Depends(get_db)):
+async def ingest_workspace(workspace_id: str, refresh: bool = False, db: AsyncSession = Depends(get_db)):
     workspace = await db.get(models.Workspace, workspace_id)
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
 
-    # Trigger background task
-    task = celery_app.send_task("apps.api.worker.process_workspace_sources", args=[workspace_id])
+    # Trigger background task (refresh=true re-checks already ingested sources too)
+    task = celery_app.send_task("apps.api.worker.process_workspace_sources", args=[workspace_id, refresh])
     return {"message": "Ingestion started", "task_id": task.id}
 
 @router.post("/{workspace_id}/analytics", response_model=schemas.IngestResponse)
@@ -105,3 +105,63 @@ async def get_themes(workspace_id: str, db: AsyncSession = Depends(get_db)):
     )
     themes = result.scalars().all()
     return themes
+
+@router.get("/{workspace_id}/ingestion-runs", response_model=List[schemas.IngestionRunResponse])
+async def list_ingestion_runs(
+    workspace_id: str,
+    source_id: Optional[str] = None,
+    sort: str = "recent",
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    workspace = await db.get(models.Workspace, workspace_id)
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+
+    # sort=slowest lists the longest runs first
+    order = models.IngestionRun.duration_ms.desc() if sort == "slowest" else models.IngestionRun.started_at.desc()
+    stmt = (
+        select(models.IngestionRun)
+        .where(models.IngestionRun.workspace_id == workspace_id)
+        .order_by(order)
+        .limit(limit)
+    )
+    if source_id:
+        stmt = stmt.where(models.IngestionRun.source_id == source_id)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+# Per-stage totals and p95 across a workspace's runs, computed in the database
+INGESTION_STAGE_SUMMARY_SQL = text("""
+    SELECT t.key AS stage,
+           count(*) AS runs,
+           sum(t.value::float) AS total_ms,
+           avg(t.value::float) AS avg_ms,
+           percentile_cont(0.95) WITHIN GROUP (ORDER BY t.value::float) AS p95_ms
+    FROM ingestion_runs r, jsonb_each_text(r.timings) AS t
+    WHERE r.workspace_id = :workspace_id
+    GROUP BY t.key
+    ORDER BY total_ms DESC
+""")
+
+INGESTION_TOTALS_SQL = text("""
+    SELECT count(*) AS runs,
+           count(*) FILTER (WHERE status = 'failed') AS failed,
+           coalesce(sum(duration_ms), 0) AS total_ms,
+           coalesce(sum(bytes_in), 0) AS bytes_in,
+           coalesce(sum(chunks_embedded), 0) AS chunks_embedded,
+           coalesce(sum(chunks_reused), 0) AS chunks_reused
+    FROM ingestion_runs
+    WHERE workspace_id = :workspace_id
+""")
+
+@router.get("/{workspace_id}/ingestion-runs/summary", response_model=schemas.IngestionSummaryResponse)
+async def summarize_ingestion_runs(workspace_id: str, db: AsyncSession = Depends(get_db)):
+    workspace = await db.get(models.Workspace, workspace_id)
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+
+    params = {"workspace_id": workspace_id}
+    totals = (await db.execute(INGESTION_TOTALS_SQL, params)).mappings().one()
+    stages = (await db.execute(INGESTION_STAGE_SUMMARY_SQL, params)).mappings().all()
+    return {**totals, "stages": [dict(row) for row in stages]}
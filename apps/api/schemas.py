@@ -1,4 +1,5 @@
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Literal, Union
+from typing_extensions import Annotated
 from pydantic import BaseModel, HttpUrl, Field
 from datetime import datetime
 import uuid
@@ -12,6 +13,7 @@ class WorkspaceCreate(WorkspaceBase):
 
 class WorkspaceResponse(WorkspaceBase):
     id: str
+    status: str
     created_at: datetime
     
     class Config:
@@ -29,6 +31,20 @@ class SourceCreateNote(SourceBase):
     type: str = "note"
     raw_text: str
 
+# Items of a bulk request, told apart by their type field
+class BulkSourceURL(SourceCreateURL):
+    type: Literal["url"] = "url"
+
+class BulkSourceNote(SourceCreateNote):
+    type: Literal["note"] = "note"
+
+BulkSourceItem = Annotated[Union[BulkSourceURL, BulkSourceNote], Field(discriminator="type")]
+
+class BulkSourceResponse(BaseModel):
+    created: int
+    ids: List[str]
+    task_id: Optional[str] = None
+
 # Used for multipart uploads - just metadata, file handled separately
 class SourceResponse(SourceBase):
     id: str
@@ -36,6 +52,7 @@ class SourceResponse(SourceBase):
     url: Optional[str] = None
     filename: Optional[str] = None
     raw_text: Optional[str] = None
+    content_hash: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -80,3 +97,38 @@ class ScorecardResultResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class IngestionRunResponse(BaseModel):
+    id: str
+    source_id: str
+    workspace_id: str
+    status: str
+    error_message: Optional[str] = None
+    started_at: datetime
+    duration_ms: float
+    timings: Dict[str, float] # stage -> milliseconds
+    bytes_in: int
+    documents: int
+    chunks_written: int
+    chunks_embedded: int
+    chunks_reused: int
+    cache: Optional[Dict[str, float]] = None
+
+    class Config:
+        from_attributes = True
+
+class IngestionStageSummary(BaseModel):
+    stage: str
+    runs: int
+    total_ms: float
+    avg_ms: float
+    p95_ms: float
+
+class IngestionSummaryResponse(BaseModel):
+    runs: int
+    failed: int
+    total_ms: float
+    bytes_in: int
+    chunks_embedded: int
+    chunks_reused: int
+    stages: List[IngestionStageSummary]
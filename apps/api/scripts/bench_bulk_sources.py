@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from apps.api.core.config import settings
+from apps.api.db import models
+from apps.api.db.session import AsyncSessionLocal
+from apps.api.main import app
+
+# Creates URL sources through POST /sources/url one at a time and through
+# POST /sources/bulk as NDJSON, in-process against the real database, and reports
+# sources/sec. The benchmark workspace is deleted afterwards.
+#
+#   python apps/api/scripts/bench_bulk_sources.py --single 500 --bulk 20000
+
+def url_items(n: int, prefix: str):
+    return [{"type": "url", "title": f"{prefix} page {i}", "url": f"https://example.com/{prefix}/{i}"} for i in range(n)]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--single", type=int, default=500)
+    parser.add_argument("--bulk", type=int, default=20000)
+    args = parser.parse_args()
+
+    api = settings.API_V1_STR
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        workspace = (await client.post(f"{api}/workspaces/", json={"name": "bench-bulk-sources"})).json()
+        ws_id = workspace["id"]
+        try:
+            start = time.perf_counter()
+            for item in url_items(args.single, "single"):
+                response = await client.post(f"{api}/sources/url", params={"workspace_id": ws_id}, json=item)
+                response.raise_for_status()
+            single = time.perf_counter() - start
+
+            body = "\n".join(json.dumps(item) for item in url_items(args.bulk, "bulk"))
+            start = time.perf_counter()
+            response = await client.post(
+                f"{api}/sources/bulk",
+                params={"workspace_id": ws_id},
+                content=body,
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            response.raise_for_status()
+            bulk = time.perf_counter() - start
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(models.Source).where(models.Source.workspace_id == ws_id))
+                await db.execute(delete(models.Workspace).where(models.Workspace.id == ws_id))
+                await db.commit()
+
+    print(f"one per request: {args.single / single:10.1f} sources/sec ({args.single} in {single:.2f}s)")
+    print(f"bulk NDJSON:     {args.bulk / bulk:10.1f} sources/sec ({args.bulk} in {bulk:.2f}s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
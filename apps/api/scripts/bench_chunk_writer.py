@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.api.core.config import settings
+from apps.api.core.text_utils import content_hash
+from apps.api.db import models
+from apps.api.services.chunk_writer import write_chunks
+
+# Writes a synthetic corpus of chunks through each write method and rolls back,
+# so the database is left untouched. Needs a migrated Postgres.
+#
+#   python apps/api/scripts/bench_chunk_writer.py --chunks 50000 --batch 512
+
+def synthetic_rows(workspace_id: str, document_id: str, n_chunks: int, dim: int = 384):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n_chunks, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    rows = []
+    for i in range(n_chunks):
+        text = f"Synthetic review chunk {i} " + "lorem ipsum " * 60
+        rows.append({
+            "id": models.generate_uuid(),
+            "workspace_id": workspace_id,
+            "document_id": document_id,
+            "chunk_index": i,
+            "text": text,
+            "embedding": vectors[i].tolist(),
+            "content_hash": content_hash(text),
+        })
+    return rows
+
+async def bench_method(Session, method: str, n_chunks: int, batch: int) -> float:
+    async with Session() as db:
+        ws = models.Workspace(name="bench")
+        db.add(ws)
+        await db.flush()
+        source = models.Source(workspace_id=ws.id, type="note", title="bench", raw_text="")
+        db.add(source)
+        await db.flush()
+        doc = models.Document(source_id=source.id, doc_type="note")
+        db.add(doc)
+        await db.flush()
+
+        rows = synthetic_rows(ws.id, doc.id, n_chunks)
+
+        start = time.perf_counter()
+        for i in range(0, len(rows), batch):
+            await write_chunks(db, rows[i:i + batch], method=method)
+        await db.flush()
+        elapsed = time.perf_counter() - start
+
+        await db.rollback()
+        return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=settings.INGEST_EMBED_BATCH_SIZE)
+    parser.add_argument("--methods", default="orm,insert,copy")
+    args = parser.parse_args()
+
+    engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"chunks: {args.chunks}, batch: {args.batch}")
+    for method in args.methods.split(","):
+        elapsed = await bench_method(Session, method, args.chunks, args.batch)
+        print(f"{method:8s} {args.chunks / elapsed:10.1f} chunks/sec ({elapsed:.2f}s)")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
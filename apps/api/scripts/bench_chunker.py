@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import pandas as pd
+
+from apps.api.core.config import settings
+from apps.api.core.text_utils import clean_text, chunk_text, iter_chunks
+
+# Compares the list-building chunk_text with the streaming chunkers on one large
+# text: throughput, peak memory, and how many chunks exceed the model's token limit
+# (everything past it is silently truncated by the model).
+#
+#   python apps/api/scripts/bench_chunker.py --mb 20
+#   python apps/api/scripts/bench_chunker.py --mb 5 --tokenizer sentence-transformers/all-MiniLM-L6-v2
+
+def load_text(mb: float) -> str:
+    csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sample_reviews.csv')
+    reviews = " ".join(pd.read_csv(csv_path)['review_text'].astype(str).tolist())
+    repeats = int(mb * 1024 * 1024 / len(reviews)) + 1
+    return clean_text(" ".join([reviews] * repeats))
+
+def bench(name, make_chunks, text, tokenizer, limit):
+    tracemalloc.start()
+    start = time.perf_counter()
+    n_chunks = 0
+    over = 0
+    for chunk in make_chunks(text):
+        n_chunks += 1
+        if tokenizer is not None and len(tokenizer(chunk)["input_ids"]) > limit:
+            over += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mb = len(text) / (1024 * 1024)
+    over_col = f"{over / n_chunks:8.1%}" if tokenizer is not None else "       -"
+    print(f"{name:16s} {n_chunks:8d} {mb / elapsed:9.1f} {peak / (1024 * 1024):10.1f} {over_col}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=10)
+    parser.add_argument("--tokenizer", default=None, help="tokenizer name or path for the sentence/token strategies")
+    args = parser.parse_args()
+
+    text = load_text(args.mb)
+    tokenizer = None
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    limit = settings.CHUNK_MAX_TOKENS
+
+    print(f"text: {len(text) / (1024 * 1024):.1f} MB")
+    # Token counting is included in the timings when a tokenizer is given
+    print(f"{'chunker':16s} {'chunks':>8s} {'MB/s':>9s} {'peak MB':>10s} {'> limit':>8s}")
+    bench("chunk_text", chunk_text, text, tokenizer, limit)
+    bench("iter char", lambda t: iter_chunks(t, "char"), text, tokenizer, limit)
+    if tokenizer is not None:
+        bench("iter sentence", lambda t: iter_chunks(t, "sentence", tokenizer=tokenizer, max_tokens=limit), text, tokenizer, limit)
+        bench("iter token", lambda t: iter_chunks(t, "token", tokenizer=tokenizer, max_tokens=limit), text, tokenizer, limit)
+
+if __name__ == "__main__":
+    main()
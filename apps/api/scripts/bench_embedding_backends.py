@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import numpy as np
+
+from apps.api.core.config import settings
+from apps.api.scripts.bench_embeddings import load_corpus
+
+# Latency and throughput of the torch, ONNX fp32 and ONNX int8 backends at several
+# batch sizes, plus cosine agreement of the ONNX vectors with torch.
+#
+#   python apps/api/scripts/bench_embedding_backends.py --chunks 1024 --batch-sizes 1,8,32,128
+
+def load_backends(names):
+    backends = {}
+    for name in names:
+        if name == "torch":
+            from sentence_transformers import SentenceTransformer
+            backends[name] = SentenceTransformer(settings.EMBEDDING_MODEL_NAME, device="cpu")
+        else:
+            from apps.api.services.onnx_backend import OnnxEmbedder
+            backends[name] = OnnxEmbedder(
+                settings.EMBEDDING_MODEL_NAME,
+                quantize=name == "onnx-int8",
+                threads=settings.EMBEDDING_ONNX_THREADS,
+            )
+    return backends
+
+def bench(model, texts, batch_size: int):
+    # Per-call latency for one batch, and sustained throughput over the corpus
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        t0 = time.perf_counter()
+        model.encode(texts[i:i + batch_size], batch_size=batch_size)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return len(texts) / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 95) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1024)
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--backends", default="torch,onnx-fp32,onnx-int8")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.chunks)
+    backends = load_backends(args.backends.split(","))
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    print(f"chunks: {len(texts)}")
+    print(f"{'backend':10s} {'batch':>6s} {'chunks/sec':>12s} {'p50 ms':>9s} {'p95 ms':>9s}")
+    for name, model in backends.items():
+        # Warm up so loading and first-call overhead are excluded
+        model.encode(texts[:8])
+        for batch_size in batch_sizes:
+            throughput, p50, p95 = bench(model, texts, batch_size)
+            print(f"{name:10s} {batch_size:6d} {throughput:12.1f} {p50:9.2f} {p95:9.2f}")
+
+    if "torch" in backends:
+        reference = np.asarray(backends["torch"].encode(texts, batch_size=64))
+        for name, model in backends.items():
+            if name == "torch":
+                continue
+            vectors = np.asarray(model.encode(texts, batch_size=64))
+            cosines = np.sum(vectors * reference, axis=1) / (
+                np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+            )
+            print(f"{name:10s} cosine vs torch: mean {cosines.mean():.5f}, min {cosines.min():.5f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import pandas as pd
+
+from apps.api.core.config import settings
+from apps.api.core.text_utils import clean_text, chunk_text
+
+# Compares the old one-encode-per-chunk ingestion path with batched encoding.
+# Talks to the model directly so Redis caching does not skew the numbers.
+#
+#   python apps/api/scripts/bench_embeddings.py --chunks 2000
+
+def load_corpus(n_chunks: int):
+    csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sample_reviews.csv')
+    reviews = pd.read_csv(csv_path)['review_text'].tolist()
+
+    texts = []
+    i = 0
+    while len(texts) < n_chunks:
+        # Vary the text so nothing is trivially identical between chunks
+        review = reviews[i % len(reviews)]
+        texts.extend(chunk_text(clean_text(f"{review} (variant {i})")))
+        i += 1
+    return texts[:n_chunks]
+
+def bench_per_chunk(model, texts):
+    start = time.perf_counter()
+    for text in texts:
+        model.encode(text)
+    return time.perf_counter() - start
+
+def bench_batched(model, texts, ingest_batch: int, encode_batch: int):
+    start = time.perf_counter()
+    for i in range(0, len(texts), ingest_batch):
+        model.encode(texts[i:i + ingest_batch], batch_size=encode_batch)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--ingest-batch", type=int, default=settings.INGEST_EMBED_BATCH_SIZE)
+    parser.add_argument("--encode-batch", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+    texts = load_corpus(args.chunks)
+
+    # Warm up so model loading and first-call overhead are excluded
+    model.encode(texts[:8])
+
+    per_chunk = bench_per_chunk(model, texts)
+    batched = bench_batched(model, texts, args.ingest_batch, args.encode_batch)
+
+    print(f"chunks:        {len(texts)}")
+    print(f"per-chunk:     {len(texts) / per_chunk:10.1f} chunks/sec ({per_chunk:.2f}s)")
+    print(f"batched:       {len(texts) / batched:10.1f} chunks/sec ({batched:.2f}s)")
+    print(f"speedup:       {per_chunk / batched:10.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import numpy as np
+
+from apps.api.services.vector_snapshot import WorkspaceVectorIndex, write_snapshot
+
+# Latency of exact in-memory search over memory-mapped workspace snapshots of
+# several sizes, for single queries and for batches. No database or model needed.
+# Compare with pgvector using bench_workspace_search.py.
+#
+#   python apps/api/scripts/bench_memory_search.py --sizes 10000,50000,200000 --k 10 --batch 32
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,50000,200000")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    root = tempfile.mkdtemp(prefix="bench-snapshots-")
+    try:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            path = os.path.join(root, str(size))
+            write_snapshot(path, [f"chunk-{i}" for i in range(size)], rng.standard_normal((size, 384), dtype=np.float32))
+            index = WorkspaceVectorIndex(path)
+            # Fault the pages in once, as a long-running API process would have them
+            index.search(rng.standard_normal((1, 384)).tolist(), args.k)
+
+            for n_queries in (1, args.batch):
+                latencies = []
+                for _ in range(args.repeats):
+                    queries = rng.standard_normal((n_queries, 384)).tolist()
+                    start = time.perf_counter()
+                    index.search(queries, args.k)
+                    latencies.append(time.perf_counter() - start)
+                ms = np.array(latencies) * 1000
+                print(
+                    f"chunks {size:8d} queries {n_queries:3d} "
+                    f"{np.percentile(ms, 50):8.2f} ms p50 {np.percentile(ms, 95):8.2f} ms p95"
+                )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import numpy as np
+from sqlalchemy import select, text, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.api.core.config import settings
+from apps.api.db import models
+from apps.api.services.search import set_search_effort
+
+# Recall@k and latency of the approximate index at several ef_search values,
+# measured against exact search (index scans disabled) on the chunks already in
+# the database. Queries are stored embeddings with noise added, so no model is needed.
+#
+#   python apps/api/scripts/bench_vector_recall.py --queries 200 --k 10 --ef 10,20,40,80,160,320
+
+async def sample_queries(db: AsyncSession, n: int, noise: float):
+    result = await db.execute(
+        select(models.Chunk.embedding)
+        .where(models.Chunk.embedding.isnot(None))
+        .order_by(func.random())
+        .limit(n)
+    )
+    rng = np.random.default_rng(0)
+    queries = []
+    for (embedding,) in result.all():
+        vector = models.embedding_array(embedding)
+        vector = vector + rng.normal(0, noise, vector.shape).astype(np.float32)
+        queries.append((vector / np.linalg.norm(vector)).tolist())
+    return queries
+
+async def top_k(db: AsyncSession, query, k: int):
+    distance = models.Chunk.embedding.cosine_distance(query)
+    result = await db.execute(select(models.Chunk.id).order_by(distance).limit(k))
+    return [row[0] for row in result.all()]
+
+async def run(Session, queries, k: int, ef_search=None, exact=False):
+    ids, latencies = [], []
+    for query in queries:
+        async with Session() as db:
+            async with db.begin():
+                if exact:
+                    await db.execute(text("SET LOCAL enable_indexscan = off"))
+                    await db.execute(text("SET LOCAL enable_bitmapscan = off"))
+                else:
+                    await set_search_effort(db, ef_search=ef_search)
+                start = time.perf_counter()
+                ids.append(await top_k(db, query, k))
+                latencies.append(time.perf_counter() - start)
+    return ids, np.array(latencies) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", default="10,20,40,80,160,320")
+    parser.add_argument("--noise", type=float, default=0.05)
+    args = parser.parse_args()
+
+    engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with Session() as db:
+        n_chunks = (await db.execute(select(func.count()).select_from(models.Chunk))).scalar_one()
+        queries = await sample_queries(db, args.queries, args.noise)
+    print(f"chunks: {n_chunks}, queries: {len(queries)}, k: {args.k}")
+
+    exact_ids, exact_ms = await run(Session, queries, args.k, exact=True)
+    print(f"{'exact':>10s} {'recall':>8s} {np.percentile(exact_ms, 50):9.2f} ms p50 {np.percentile(exact_ms, 95):9.2f} ms p95")
+
+    for ef in [int(e) for e in args.ef.split(",")]:
+        ids, ms = await run(Session, queries, args.k, ef_search=ef)
+        recall = np.mean([len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(ids, exact_ids)])
+        print(f"{'ef=' + str(ef):>10s} {recall:8.3f} {np.percentile(ms, 50):9.2f} ms p50 {np.percentile(ms, 95):9.2f} ms p95")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
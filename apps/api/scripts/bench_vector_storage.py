@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from apps.api.core.config import settings
+
+# Storage, recall@k and latency of the embedding layouts, built from the same vectors:
+#   vector   float32 column + HNSW (the default schema)
+#   halfvec  float16 column + HNSW (VECTOR_STORAGE=halfvec)
+#   binary   HNSW over binary_quantize()::bit, top candidates re-ranked by exact
+#            cosine distance (VECTOR_BINARY_RERANK)
+# Embeddings are copied from chunks into temporary tables, so the real schema is not
+# touched. Needs a migrated Postgres with pgvector 0.7+.
+#
+#   python apps/api/scripts/bench_vector_storage.py --rows 100000 --queries 200 --k 10 --candidates 200
+
+DIM = 384
+
+QUERIES = {
+    "vector": "SELECT id FROM bench_vector ORDER BY embedding <=> CAST(:q AS vector(384)) LIMIT :k",
+    "halfvec": "SELECT id FROM bench_halfvec ORDER BY embedding <=> CAST(:q AS halfvec(384)) LIMIT :k",
+    "binary": """
+        SELECT id FROM (
+            SELECT id, embedding FROM bench_vector
+            ORDER BY binary_quantize(embedding)::bit(384) <~> binary_quantize(CAST(:q AS vector(384)))::bit(384)
+            LIMIT :candidates
+        ) candidates
+        ORDER BY embedding <=> CAST(:q AS vector(384)) LIMIT :k
+    """,
+}
+
+# Table and index behind each layout
+RELATIONS = {
+    "vector": ("bench_vector", "bench_vector_hnsw"),
+    "halfvec": ("bench_halfvec", "bench_halfvec_hnsw"),
+    "binary": ("bench_vector", "bench_vector_bit"),
+}
+
+def vector_literal(vector) -> str:
+    return "[" + ",".join(str(float(x)) for x in vector) + "]"
+
+async def build_tables(conn, rows: int):
+    m = int(settings.VECTOR_HNSW_M)
+    ef_construction = int(settings.VECTOR_HNSW_EF_CONSTRUCTION)
+    with_params = f"WITH (m = {m}, ef_construction = {ef_construction})"
+    await conn.execute(text(
+        "CREATE TEMP TABLE bench_vector AS "
+        "SELECT row_number() OVER () AS id, embedding::vector(384) AS embedding "
+        "FROM chunks WHERE embedding IS NOT NULL LIMIT :rows"
+    ), {"rows": rows})
+    await conn.execute(text(
+        "CREATE TEMP TABLE bench_halfvec AS SELECT id, embedding::halfvec(384) AS embedding FROM bench_vector"
+    ))
+    await conn.execute(text(f"CREATE INDEX bench_vector_hnsw ON bench_vector USING hnsw (embedding vector_cosine_ops) {with_params}"))
+    await conn.execute(text(f"CREATE INDEX bench_halfvec_hnsw ON bench_halfvec USING hnsw (embedding halfvec_cosine_ops) {with_params}"))
+    await conn.execute(text(
+        "CREATE INDEX bench_vector_bit ON bench_vector "
+        f"USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops) {with_params}"
+    ))
+    await conn.execute(text("ANALYZE bench_vector"))
+    await conn.execute(text("ANALYZE bench_halfvec"))
+
+async def sample_queries(conn, n: int, noise: float):
+    result = await conn.execute(
+        text("SELECT embedding::text FROM bench_vector ORDER BY random() LIMIT :n"), {"n": n}
+    )
+    rng = np.random.default_rng(0)
+    queries = []
+    for (embedding,) in result.all():
+        vector = np.array(embedding.strip("[]").split(","), dtype=np.float32)
+        vector = vector + rng.normal(0, noise, DIM).astype(np.float32)
+        queries.append(vector_literal(vector / np.linalg.norm(vector)))
+    return queries
+
+async def run(conn, sql: str, queries, k: int, candidates: int):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        result = await conn.execute(text(sql), {"q": q, "k": k, "candidates": candidates})
+        ids.append([row[0] for row in result.all()])
+        latencies.append(time.perf_counter() - start)
+    return ids, np.array(latencies) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=settings.VECTOR_BINARY_CANDIDATES)
+    parser.add_argument("--ef-search", type=int, default=100)
+    parser.add_argument("--noise", type=float, default=0.05)
+    args = parser.parse_args()
+
+    engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    async with engine.connect() as conn:
+        await build_tables(conn, args.rows)
+        n_rows = (await conn.execute(text("SELECT count(*) FROM bench_vector"))).scalar_one()
+        queries = await sample_queries(conn, args.queries, args.noise)
+        # The binary pass needs at least `candidates` results out of the index
+        ef_search = max(args.ef_search, args.candidates)
+        await conn.execute(text(f"SET hnsw.ef_search = {int(ef_search)}"))
+        print(f"rows: {n_rows}, queries: {len(queries)}, k: {args.k}, candidates: {args.candidates}, ef_search: {ef_search}")
+
+        # Exact float32 neighbours as ground truth
+        await conn.execute(text("SET enable_indexscan = off"))
+        exact_ids, _ = await run(conn, QUERIES["vector"], queries, args.k, args.candidates)
+        await conn.execute(text("RESET enable_indexscan"))
+
+        for mode, sql in QUERIES.items():
+            table, index = RELATIONS[mode]
+            sizes = (await conn.execute(
+                text("SELECT pg_table_size(CAST(:t AS regclass)), pg_relation_size(CAST(:i AS regclass))"),
+                {"t": table, "i": index},
+            )).one()
+            ids, ms = await run(conn, sql, queries, args.k, args.candidates)
+            recall = np.mean([len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(ids, exact_ids)])
+            print(
+                f"{mode:8s} table {sizes[0] / 2**20:8.1f} MB index {sizes[1] / 2**20:8.1f} MB "
+                f"recall {recall:6.3f} {np.percentile(ms, 50):8.2f} ms p50 {np.percentile(ms, 95):8.2f} ms p95"
+            )
+
+        await conn.rollback()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to import apps modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.api.core.config import settings
+from apps.api.core.text_utils import content_hash
+from apps.api.db import models
+from apps.api.services.chunk_writer import write_chunks
+from apps.api.services.search import set_search_effort, vector_search_stmt
+
+# Filtered vector search as the number of workspaces grows. For each scale, loads
+# that many synthetic workspaces and compares the old query (workspace filter
+# through documents and sources) with the one on chunks.workspace_id. It reports
+# how full the results are, recall against exact search, and latency. Everything
+# runs in one transaction that is rolled back. Needs a migrated Postgres.
+#
+#   python apps/api/scripts/bench_workspace_search.py --scales 10,100,1000 --chunks-per-workspace 100
+
+def joined_filter_stmt(workspace_id: str, query_embedding, limit: int):
+    # The search query before chunks had a workspace_id of their own
+    distance = models.Chunk.embedding.cosine_distance(query_embedding)
+    return (
+        select(models.Chunk.id)
+        .join(models.Document, models.Chunk.document_id == models.Document.id)
+        .join(models.Source, models.Document.source_id == models.Source.id)
+        .where(models.Source.workspace_id == workspace_id)
+        .order_by(distance)
+        .limit(limit)
+    )
+
+async def load_workspaces(db: AsyncSession, n_workspaces: int, per_workspace: int, rng, dim: int = 384):
+    workspace_ids = []
+    for w in range(n_workspaces):
+        ws = models.Workspace(name=f"bench-{w}")
+        db.add(ws)
+        await db.flush()
+        source = models.Source(workspace_id=ws.id, type="note", title="bench", raw_text="")
+        db.add(source)
+        await db.flush()
+        doc = models.Document(source_id=source.id, doc_type="note")
+        db.add(doc)
+        await db.flush()
+
+        # Each workspace gets its own region of the space, as tenants' corpora do
+        center = rng.standard_normal(dim).astype(np.float32)
+        vectors = center + 0.5 * rng.standard_normal((per_workspace, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        rows = []
+        for i in range(per_workspace):
+            chunk_text = f"bench chunk {w}-{i}"
+            rows.append({
+                "id": models.generate_uuid(),
+                "workspace_id": ws.id,
+                "document_id": doc.id,
+                "chunk_index": i,
+                "text": chunk_text,
+                "embedding": vectors[i].tolist(),
+                "content_hash": content_hash(chunk_text),
+            })
+        await write_chunks(db, rows)
+        workspace_ids.append(ws.id)
+    await db.execute(text("ANALYZE chunks"))
+    return workspace_ids
+
+async def run_queries(db: AsyncSession, build, queries, limit: int, exact: bool = False):
+    ids, latencies = [], []
+    for workspace_id, query in queries:
+        if exact:
+            await db.execute(text("SET LOCAL enable_indexscan = off"))
+            await db.execute(text("SET LOCAL enable_bitmapscan = off"))
+        else:
+            await set_search_effort(db)
+        start = time.perf_counter()
+        result = await db.execute(build(workspace_id, query, limit))
+        latencies.append(time.perf_counter() - start)
+        ids.append([row[0] for row in result.all()])
+        if exact:
+            await db.execute(text("RESET enable_indexscan"))
+            await db.execute(text("RESET enable_bitmapscan"))
+    return ids, np.array(latencies) * 1000
+
+async def bench_scale(Session, n_workspaces: int, per_workspace: int, n_queries: int, limit: int):
+    rng = np.random.default_rng(n_workspaces)
+    async with Session() as db:
+        workspace_ids = await load_workspaces(db, n_workspaces, per_workspace, rng)
+
+        queries = []
+        for _ in range(n_queries):
+            query = rng.standard_normal(384).astype(np.float32)
+            queries.append((workspace_ids[rng.integers(len(workspace_ids))], (query / np.linalg.norm(query)).tolist()))
+
+        def partitioned(workspace_id, query, k):
+            stmt = vector_search_stmt(workspace_id, query, k)
+            return stmt.with_only_columns(models.Chunk.id)
+
+        exact_ids, _ = await run_queries(db, joined_filter_stmt, queries, limit, exact=True)
+        print(f"workspaces: {n_workspaces}, chunks: {n_workspaces * per_workspace}")
+        for name, build in (("joined", joined_filter_stmt), ("partitioned", partitioned)):
+            ids, ms = await run_queries(db, build, queries, limit)
+            filled = np.mean([len(r) / limit for r in ids])
+            recall = np.mean([len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(ids, exact_ids)])
+            print(
+                f"  {name:12s} filled {filled:6.3f} recall {recall:6.3f} "
+                f"{np.percentile(ms, 50):8.2f} ms p50 {np.percentile(ms, 95):8.2f} ms p95"
+            )
+
+        await db.rollback()
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="10,100,1000")
+    parser.add_argument("--chunks-per-workspace", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    for scale in [int(s) for s in args.scales.split(",")]:
+        await bench_scale(Session, scale, args.chunks_per_workspace, args.queries, args.limit)
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
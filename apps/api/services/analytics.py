@@ -7,17 +7,21 @@ from datetime import datetime
 import json
 
 from apps.api.db import models
+from apps.api.services import themes
 
-# Ensure NLTK data is downloaded
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon', quiet=True)
+_nltk_data_ready = False
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+def ensure_nltk_data():
+    # Downloads happen on first use, not at import time
+    global _nltk_data_ready
+    if _nltk_data_ready:
+        return
+    for path, package in (('sentiment/vader_lexicon.zip', 'vader_lexicon'), ('tokenizers/punkt', 'punkt')):
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+    _nltk_data_ready = True
 
 # Configurable claims
 CLAIMS = [
@@ -41,6 +45,7 @@ async def run_workspace_analytics(workspace_id: str, db: AsyncSession):
         return
 
     # 2. Initialize Analyzers
+    ensure_nltk_data()
     sia = SentimentIntensityAnalyzer()
     
     # Aggregators
@@ -176,10 +181,6 @@ async def run_workspace_analytics(workspace_id: str, db: AsyncSession):
         )
     ]
     
-from apps.api.services import themes
-
-    # ... (existing analytics code) ...
-    
     db.add_all(insights)
     
     # Run Theme Extraction
@@ -0,0 +1,66 @@
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pgvector.asyncpg import register_vector
+
+from apps.api.db import models
+from apps.api.core.config import settings
+
+# Columns written for every chunk row; created_at falls back to the server default
+CHUNK_COLUMNS = ["id", "workspace_id", "document_id", "chunk_index", "text", "embedding", "content_hash"]
+
+async def load_embeddings(db: AsyncSession, hashes: Iterable[str]) -> Dict[str, Any]:
+    # Existing embeddings for the given content hashes, one per hash
+    hashes = list(hashes)
+    if not hashes:
+        return {}
+    result = await db.execute(
+        select(models.Chunk.content_hash, models.Chunk.embedding)
+        .where(models.Chunk.content_hash.in_(hashes))
+        .where(models.Chunk.embedding.isnot(None))
+        .distinct(models.Chunk.content_hash)
+    )
+    return dict(result.all())
+
+async def write_chunks(db: AsyncSession, rows: List[Dict[str, Any]], method: Optional[str] = None):
+    # rows are dicts keyed by CHUNK_COLUMNS. They are written inside the session's
+    # current transaction, so the parent documents must already be flushed.
+    if not rows:
+        return
+
+    method = method or settings.CHUNK_WRITE_METHOD
+    if method == "copy" and db.bind.dialect.driver == "asyncpg":
+        await _copy_chunks(db, rows)
+    elif method == "orm":
+        db.add_all([models.Chunk(**row) for row in rows])
+        await db.flush()
+    else:
+        await _insert_chunks(db, rows)
+
+async def _copy_chunks(db: AsyncSession, rows: List[Dict[str, Any]]):
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    pg = raw.driver_connection
+
+    # COPY ... FROM STDIN (FORMAT binary) needs a binary codec for the vector types.
+    # The codecs are only registered for the duration of the copy because the ORM
+    # binds vectors as text literals on the same pooled connection.
+    await register_vector(pg)
+    try:
+        await pg.copy_records_to_table(
+            models.Chunk.__tablename__,
+            records=[tuple(row[c] for c in CHUNK_COLUMNS) for row in rows],
+            columns=CHUNK_COLUMNS,
+        )
+    finally:
+        await pg.reset_type_codec("vector")
+        # Only registered when the server's pgvector has them (0.7+)
+        for type_name in ("halfvec", "sparsevec"):
+            try:
+                await pg.reset_type_codec(type_name)
+            except ValueError:
+                pass
+
+async def _insert_chunks(db: AsyncSession, rows: List[Dict[str, Any]]):
+    # Executed as multi-row INSERT ... VALUES statements (SQLAlchemy "insertmanyvalues")
+    await db.execute(insert(models.Chunk), rows)
@@ -1,41 +1,304 @@
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+import hashlib
+import logging
+import threading
+import time
+import numpy as np
 import redis
-import json
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from apps.api.core.config import settings
 
-# Global model instance
-# note: in production, this should likely be handled by a separate serving container (e.g. TorchServe) 
-# or initialized carefully to avoid memory overhead in every worker if concurrency is high.
-# For MVP, loading global is fine.
+logger = logging.getLogger(__name__)
+
+# Global model instance, loaded on first use (or by warm_up at startup).
+# sentence_transformers / torch are imported there, not at module level, so that
+# importing the API stays fast.
 _model = None
+_ready = threading.Event()
 
 def get_model():
+    # Either backend exposes encode(texts, batch_size=...) -> (n, dim) float32 array
     global _model
     if _model is None:
-        _model = SentenceTransformer('all-MiniLM-L6-v2')
+        if settings.EMBEDDING_BACKEND == "onnx":
+            from apps.api.services.onnx_backend import OnnxEmbedder
+            _model = OnnxEmbedder(
+                settings.EMBEDDING_MODEL_NAME,
+                quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+                threads=settings.EMBEDDING_ONNX_THREADS,
+            )
+        else:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
     return _model
 
-# Redis connection
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST, 
-    port=int(settings.REDIS_PORT), 
-    db=0, 
-    decode_responses=True
+def encoder_id() -> str:
+    # Names the encoder whose vectors are cached: the ONNX export, and its int8
+    # quantization even more so, gives slightly different vectors than torch
+    if settings.EMBEDDING_BACKEND == "onnx":
+        quantization = "int8" if settings.EMBEDDING_ONNX_QUANTIZE else "fp32"
+        return f"{settings.EMBEDDING_MODEL_NAME}:onnx-{quantization}"
+    return settings.EMBEDDING_MODEL_NAME
+
+_tokenizer = None
+
+def get_tokenizer():
+    # The model's tokenizer, for token-aware chunking. When encoding happens on the
+    # embedding server only the tokenizer is loaded here, not the model.
+    global _tokenizer
+    if _tokenizer is None:
+        if _model is not None or not use_server():
+            _tokenizer = get_model().tokenizer
+        else:
+            from transformers import AutoTokenizer
+            name = settings.EMBEDDING_MODEL_NAME
+            _tokenizer = AutoTokenizer.from_pretrained(name if "/" in name else f"sentence-transformers/{name}")
+    return _tokenizer
+
+def use_server() -> bool:
+    return bool(settings.EMBEDDING_SERVER_URL or settings.EMBEDDING_SERVER_UDS)
+
+_server_client = None
+
+def get_server_client():
+    # Sync httpx client for the embedding server, over a Unix socket when EMBEDDING_SERVER_UDS is set
+    global _server_client
+    if _server_client is None:
+        import httpx
+        transport = httpx.HTTPTransport(uds=settings.EMBEDDING_SERVER_UDS) if settings.EMBEDDING_SERVER_UDS else None
+        _server_client = httpx.Client(
+            base_url=settings.EMBEDDING_SERVER_URL or "http://embedding-server",
+            transport=transport,
+            timeout=settings.EMBEDDING_SERVER_TIMEOUT,
+        )
+    return _server_client
+
+def encode(texts: List[str]) -> np.ndarray:
+    # One (len(texts), dim) float32 array, from the embedding server if one is configured.
+    # Any successful encode marks the process ready.
+    if use_server():
+        response = get_server_client().post("/embed", json={"texts": texts})
+        response.raise_for_status()
+        dim = int(response.headers["X-Embedding-Dim"])
+        vectors = np.frombuffer(response.content, dtype="<f4").reshape(-1, dim)
+    else:
+        vectors = get_model().encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE)
+    _ready.set()
+    return vectors
+
+def warm_up():
+    # Load the model (or reach the embedding server) and run one encode so the first
+    # request does not pay for it. Readiness is reported through is_ready().
+    encode(["warm up"])
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+_redis_client: Optional[redis.Redis] = None
+
+def get_redis_client() -> redis.Redis:
+    # Redis connection (binary: cached values are packed float32), created on first use
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=int(settings.REDIS_PORT),
+            db=0,
+            decode_responses=False
+        )
+    return _redis_client
+
+class EmbeddingCache:
+    # Redis cache keyed by a digest of (encoder id, text) so keys stay fixed-size,
+    # with vectors stored as little-endian float32 bytes (384 dims -> 1.5 KB).
+    # Whole batches are read with one MGET and written with one pipeline.
+    def __init__(self, client: Optional[redis.Redis], model_name: str, ttl: int):
+        # client=None uses the shared connection from get_redis_client()
+        self._client = client
+        self.model_name = model_name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+
+    def key(self, text: str) -> str:
+        digest = hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"), digest_size=16)
+        return f"emb:{digest.hexdigest()}"
+
+    @staticmethod
+    def pack(embedding) -> bytes:
+        return np.asarray(embedding, dtype="<f4").tobytes()
+
+    @staticmethod
+    def unpack(value: bytes) -> List[float]:
+        return np.frombuffer(value, dtype="<f4").tolist()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        if not texts:
+            return []
+        try:
+            values = self.client.mget([self.key(t) for t in texts])
+        except redis.RedisError as e:
+            # The cache is an optimisation; fall back to encoding everything
+            logger.warning("Embedding cache read failed: %s", e)
+            self.errors += 1
+            self.misses += len(texts)
+            return [None] * len(texts)
+
+        results = [self.unpack(v) if v else None for v in values]
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(texts) - hits
+        return results
+
+    def set_many(self, embeddings: Dict[str, List[float]]):
+        if not embeddings:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for text, embedding in embeddings.items():
+                pipe.set(self.key(text), self.pack(embedding), ex=self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Embedding cache write failed: %s", e)
+            self.errors += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class LRUEmbeddingCache:
+    # In-process tier in front of Redis so hot queries never leave the process.
+    # Bounded by entry count and by bytes of packed vectors; entries expire after ttl seconds.
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return EmbeddingCache.unpack(value)
+
+    def put(self, key: str, embedding: List[float]):
+        value = EmbeddingCache.pack(embedding)
+        size = len(key) + len(value)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# Cache (expire in 24h)
+embedding_cache = EmbeddingCache(None, encoder_id(), ttl=settings.EMBEDDING_CACHE_TTL)
+
+local_cache = LRUEmbeddingCache(
+    max_entries=settings.EMBEDDING_LRU_MAX_ENTRIES,
+    max_bytes=settings.EMBEDDING_LRU_MAX_BYTES,
+    ttl=settings.EMBEDDING_LRU_TTL,
 )
 
+def get_cache_stats() -> Dict[str, Dict[str, float]]:
+    return {"local": local_cache.stats(), "redis": embedding_cache.stats()}
+
 def get_embedding(text: str) -> List[float]:
-    # Check cache
-    cache_key = f"emb:{text}"
-    cached = redis_client.get(cache_key)
-    if cached:
-        return json.loads(cached)
-
-    # Generate
-    model = get_model()
-    embedding = model.encode(text).tolist()
-
-    # Cache (expire in 24h)
-    redis_client.setex(cache_key, 86400, json.dumps(embedding))
-    
-    return embedding
+    return get_embeddings([text])[0]
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    return get_embeddings_traced(texts)[0]
+
+def get_embeddings_traced(texts: List[str]) -> Tuple[List[List[float]], List[str]]:
+    # Embeddings plus, per text, the tier that served it: local, redis or model
+    if not texts:
+        return [], []
+
+    # Check the in-process tier once per distinct text
+    found: Dict[str, List[float]] = {}
+    tiers: Dict[str, str] = {}
+    remote: List[str] = []
+    for text in dict.fromkeys(texts):
+        embedding = local_cache.get(embedding_cache.key(text))
+        if embedding is not None:
+            found[text] = embedding
+            tiers[text] = "local"
+        else:
+            remote.append(text)
+
+    # Then Redis for the rest, promoting hits into the local tier
+    misses: List[str] = []
+    for text, embedding in zip(remote, embedding_cache.get_many(remote)):
+        if embedding is not None:
+            found[text] = embedding
+            tiers[text] = "redis"
+            local_cache.put(embedding_cache.key(text), embedding)
+        else:
+            misses.append(text)
+
+    if misses:
+        # Generate all misses in a single batched forward pass
+        vectors = encode(misses)
+
+        generated = {text: vector.tolist() for text, vector in zip(misses, vectors)}
+        embedding_cache.set_many(generated)
+        for text, embedding in generated.items():
+            local_cache.put(embedding_cache.key(text), embedding)
+            tiers[text] = "model"
+        found.update(generated)
+
+    return [found[text] for text in texts], [tiers[text] for text in texts]
@@ -10,13 +10,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from collections import defaultdict
 
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-import matplotlib
-matplotlib.use('Agg') # Non-interactive backend
-import matplotlib.pyplot as plt
-
 from apps.api.db import models
 
 async def generate_csv_export(workspace_id: str, db: AsyncSession) -> io.BytesIO:
@@ -77,6 +70,15 @@ async def generate_csv_export(workspace_id: str, db: AsyncSession) -> io.BytesIO
     return zip_buffer
 
 async def generate_pptx_export(workspace_id: str, db: AsyncSession) -> str:
+    # pptx and matplotlib are imported here rather than at module level so they
+    # stay out of API startup
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    from pptx.enum.text import PP_ALIGN
+    import matplotlib
+    matplotlib.use('Agg') # Non-interactive backend
+    import matplotlib.pyplot as plt
+
     # Fetch Data
     # Workspace info
     ws = await db.get(models.Workspace, workspace_id)
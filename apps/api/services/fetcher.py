@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import json
+import os
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from apps.api.core.config import settings
+
+@dataclass
+class FetchResult:
+    url: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True when the server answered 304 and the body came from the on-disk cache
+    not_modified: bool = False
+
+class HttpCache:
+    # On-disk cache of response bodies plus their validators (ETag / Last-Modified),
+    # one <sha256(url)>.json / .body pair per URL.
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _path(self, url: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.{ext}")
+
+    def load(self, url: str) -> Optional[FetchResult]:
+        try:
+            with open(self._path(url, "json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(url, "body"), "r", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, ValueError):
+            return None
+        return FetchResult(url=url, text=text, etag=meta.get("etag"), last_modified=meta.get("last_modified"))
+
+    def store(self, result: FetchResult):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = {"url": result.url, "etag": result.etag, "last_modified": result.last_modified}
+        # Write the body first and swap files in atomically so readers never see a partial entry
+        for ext, data in (("body", result.text), ("json", json.dumps(meta))):
+            path = self._path(result.url, ext)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+class Fetcher:
+    # Async URL fetcher sharing one connection pool, with a concurrency limit per host
+    # and conditional GETs against the on-disk cache.
+    def __init__(
+        self,
+        cache: Optional[HttpCache] = None,
+        max_connections: Optional[int] = None,
+        max_per_host: Optional[int] = None,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.cache = cache or HttpCache(settings.HTTP_CACHE_DIR)
+        self.max_per_host = max_per_host or settings.HTTP_MAX_PER_HOST
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections or settings.HTTP_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(timeout or settings.HTTP_TIMEOUT),
+            follow_redirects=True,
+            transport=transport,
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(self, url: str) -> FetchResult:
+        cached = await asyncio.to_thread(self.cache.load, url)
+
+        headers = {}
+        if cached:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        host = urlsplit(url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        async with limit:
+            response = await self.client.get(url, headers=headers)
+
+        if response.status_code == 304 and cached:
+            cached.not_modified = True
+            return cached
+
+        response.raise_for_status()
+        result = FetchResult(
+            url=url,
+            text=response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        # Only responses carrying validators can be revalidated later
+        if result.etag or result.last_modified:
+            await asyncio.to_thread(self.cache.store, result)
+        return result
+
+    async def aclose(self):
+        await self.client.aclose()
+
+# One fetcher per event loop: Celery tasks each run their own loop via asyncio.run,
+# and httpx clients/semaphores must not outlive the loop they were created on.
+_fetchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Fetcher]" = weakref.WeakKeyDictionary()
+
+def get_fetcher() -> Fetcher:
+    loop = asyncio.get_running_loop()
+    fetcher = _fetchers.get(loop)
+    if fetcher is None:
+        fetcher = _fetchers[loop] = Fetcher()
+    return fetcher
+
+async def close_fetcher():
+    fetcher = _fetchers.pop(asyncio.get_running_loop(), None)
+    if fetcher is not None:
+        await fetcher.aclose()
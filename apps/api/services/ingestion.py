@@ -1,140 +1,474 @@
-import requests
 from bs4 import BeautifulSoup
-import pdfplumber
+import asyncio
+import hashlib
+import json
 import pandas as pd
 import io
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, insert, update, delete, text
 from datetime import datetime
-from typing import List
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 
 from apps.api.db import models
-from apps.api.core.text_utils import clean_text, chunk_text
+from apps.api.core.config import settings
+from apps.api.core.text_utils import clean_text, iter_chunks, content_hash
 
-async def process_source(source_id: str, db: AsyncSession):
+# Async embedding callable: one (vector, cache tier) pair per text
+EmbedFn = Callable[[List[str]], Awaitable[Sequence[Tuple[List[float], str]]]]
+
+async def process_source(source_id: str, db: AsyncSession, embed: Optional[EmbedFn] = None):
+    # embed is how chunk batches get their vectors; the staged pipeline passes a
+    # shared batching stage, otherwise get_embeddings runs in a thread
     source = await db.get(models.Source, source_id)
     if not source:
         return
 
+    # Fingerprint of the content last ingested successfully; a source whose
+    # content still matches it is skipped on re-ingest.
+    previous = source.fingerprint if source.status == "completed" else None
+    # Kept for the run record: the source's attributes expire on rollback
+    source_ref = (source.id, source.workspace_id)
+    stats = IngestionStats()
+
     try:
         source.status = "processing"
         await db.commit()
 
+        batch = ChunkBatch(db, embed=embed, stats=stats, workspace_id=source.workspace_id)
+        fingerprint = None
         if source.type == "url":
-            await _process_url(source, db)
+            fingerprint = await _process_url(source, db, batch, previous)
         elif source.type == "note":
-            await _process_note(source, db)
+            fingerprint = await _process_note(source, db, batch, previous)
         elif source.type == "pdf":
-            await _process_pdf(source, db)
+            fingerprint = await _process_pdf(source, db, batch, previous)
         elif source.type == "csv":
-            await _process_csv(source, db)
+            fingerprint = await _process_csv(source, db, batch, previous)
+        await batch.flush()
+        if previous is not None and fingerprint == previous:
+            stats.outcome = "unchanged"
         
+        source.fingerprint = fingerprint
         source.status = "completed"
+        source.error_message = None
+        db.add(stats.to_run(*source_ref))
         await db.commit()
+        if stats.outcome != "unchanged":
+            # Cached searches of this workspace no longer reflect its chunks
+            await asyncio.to_thread(search_cache.bump, source_ref[1])
 
     except Exception as e:
         await db.rollback()
         source.status = "failed"
         source.error_message = str(e)
+        db.add(stats.to_run(*source_ref, error=str(e)))
         await db.commit()
 
-from apps.api.services.embeddings import get_embedding
+from apps.api.services.embeddings import get_embeddings_traced, get_tokenizer
+from apps.api.services.chunk_writer import load_embeddings, write_chunks
+from apps.api.services.fetcher import get_fetcher
+from apps.api.services.pdf_extract import iter_pdf_pages
+from apps.api.services.search import search_cache
+from apps.api.services.telemetry import IngestionStats
 
-async def _create_chunks(document: models.Document, raw_text: str, db: AsyncSession):
-    cleaned = clean_text(raw_text)
-    text_chunks = chunk_text(cleaned)
-    
-    for i, text in enumerate(text_chunks):
-        embedding = get_embedding(text)
-        chunk = models.Chunk(
-            document_id=document.id,
-            chunk_index=i,
-            text=text,
-            embedding=embedding
+async def _embed_in_thread(texts: List[str]) -> List[Tuple[List[float], str]]:
+    # Encoding is CPU-bound; keep it off the event loop
+    vectors, tiers = await asyncio.to_thread(get_embeddings_traced, texts)
+    return list(zip(vectors, tiers))
+
+class ChunkBatch:
+    # Buffers chunk rows across documents (and CSV rows) so a whole batch is
+    # embedded with one model.encode call and written with one bulk COPY/INSERT.
+    # Texts whose content hash already has an embedding in the database reuse it.
+    def __init__(
+        self,
+        db: AsyncSession,
+        size: Optional[int] = None,
+        embed: Optional[EmbedFn] = None,
+        stats: Optional[IngestionStats] = None,
+        workspace_id: Optional[str] = None,
+    ):
+        self.db = db
+        # Owner of every chunk in the batch (chunks.workspace_id)
+        self.workspace_id = workspace_id
+        self.size = size or settings.INGEST_EMBED_BATCH_SIZE
+        self.embed = embed or _embed_in_thread
+        self.stats = stats or IngestionStats()
+        self.pending: List[Dict[str, Any]] = []
+
+    @property
+    def reused(self) -> int:
+        return self.stats.chunks_reused
+
+    @property
+    def embedded(self) -> int:
+        return self.stats.chunks_embedded
+
+    async def add(self, document_id: str, chunk_index: int, text: str):
+        self.pending.append({
+            "id": models.generate_uuid(),
+            "workspace_id": self.workspace_id,
+            "document_id": document_id,
+            "chunk_index": chunk_index,
+            "text": text,
+            "content_hash": content_hash(text),
+        })
+        if len(self.pending) >= self.size:
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+
+        with self.stats.stage("lookup"):
+            known = await load_embeddings(self.db, {r["content_hash"] for r in rows})
+        new_rows = [r for r in rows if r["content_hash"] not in known]
+        for row in rows:
+            if row["content_hash"] in known:
+                row["embedding"] = known[row["content_hash"]]
+
+        with self.stats.stage("embed"):
+            embedded = await self.embed([r["text"] for r in new_rows]) if new_rows else []
+        for row, (embedding, tier) in zip(new_rows, embedded):
+            row["embedding"] = embedding
+        self.stats.record_tiers(tier for _, tier in embedded)
+
+        self.stats.chunks_reused += len(rows) - len(new_rows)
+        self.stats.chunks_embedded += len(new_rows)
+        with self.stats.stage("write"):
+            await write_chunks(self.db, rows)
+        self.stats.chunks_written += len(rows)
+
+def _chunk_text(cleaned: str):
+    # Lazily chunks a document with the configured strategy
+    strategy = settings.CHUNK_STRATEGY
+    return iter_chunks(
+        cleaned,
+        strategy=strategy,
+        size=settings.CHUNK_SIZE,
+        overlap=settings.CHUNK_OVERLAP,
+        tokenizer=get_tokenizer() if strategy in ("sentence", "token") else None,
+        max_tokens=settings.CHUNK_MAX_TOKENS,
+        overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+    )
+
+async def _add_chunks(document_id: str, cleaned: str, batch: ChunkBatch):
+    for i, text in enumerate(_chunk_text(cleaned)):
+        await batch.add(document_id, i, text)
+
+def _chunking_signature() -> str:
+    # The settings that decide chunk boundaries; part of every source fingerprint and
+    # document hash, so changing them re-chunks documents on their next refresh
+    return json.dumps([
+        settings.CHUNK_STRATEGY,
+        settings.CHUNK_SIZE,
+        settings.CHUNK_OVERLAP,
+        settings.CHUNK_MAX_TOKENS,
+        settings.CHUNK_OVERLAP_TOKENS,
+    ])
+
+def _versioned(fingerprint: str) -> str:
+    return content_hash(fingerprint + "\n" + _chunking_signature())
+
+def _document_hash(metadata: Optional[dict], cleaned: str) -> str:
+    return _versioned(content_hash(json.dumps(metadata, sort_keys=True, default=str) + "\n" + cleaned))
+
+def _file_fingerprint(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+async def _file_source_fingerprint(source: models.Source, file_path: str) -> str:
+    # Uploads are hashed while they are streamed to disk; only older sources
+    # without a stored hash need the file read again
+    if source.content_hash:
+        return source.content_hash
+    return await asyncio.to_thread(_file_fingerprint, file_path)
+
+# Copies another source's documents and chunks (embeddings included) in one
+# statement. The mapping CTE is materialised once, so each copied chunk points at
+# the new id of its document. PDF documents carry their filename in metadata.
+COPY_SOURCE_SQL = text("""
+    WITH mapping AS (
+        SELECT id AS old_id, gen_random_uuid()::text AS new_id
+        FROM documents WHERE source_id = :from_source
+    ), copied_documents AS (
+        INSERT INTO documents (id, source_id, doc_type, metadata, content_hash)
+        SELECT m.new_id, :to_source, d.doc_type,
+               CASE WHEN d.doc_type = 'report' THEN jsonb_build_object('filename', CAST(:filename AS text)) ELSE d.metadata END,
+               d.content_hash
+        FROM documents d JOIN mapping m ON m.old_id = d.id
+    )
+    INSERT INTO chunks (id, workspace_id, document_id, chunk_index, text, embedding, content_hash)
+    SELECT gen_random_uuid()::text, :workspace_id, m.new_id, c.chunk_index, c.text, c.embedding, c.content_hash
+    FROM chunks c JOIN mapping m ON m.old_id = c.document_id
+    WHERE c.workspace_id = :from_workspace
+""")
+
+async def _copy_identical_upload(source: models.Source, db: AsyncSession, file_hash: str, fingerprint: str) -> bool:
+    # An identical file already ingested elsewhere with the same chunking settings
+    # yields identical documents and chunks, so they are copied server-side instead
+    # of parsed and embedded again
+    result = await db.execute(
+        select(models.Source.id, models.Source.workspace_id)
+        .where(models.Source.content_hash == file_hash)
+        .where(models.Source.fingerprint == fingerprint)
+        .where(models.Source.type == source.type)
+        .where(models.Source.status == "completed")
+        .where(models.Source.id != source.id)
+        .order_by(models.Source.created_at.desc())
+        .limit(1)
+    )
+    donor = result.one_or_none()
+    if donor is None:
+        return False
+    donor_id, donor_workspace_id = donor
+
+    result = await db.execute(select(models.Document.id).where(models.Document.source_id == source.id))
+    await _delete_documents(db, source.workspace_id, list(result.scalars().all()))
+    await db.execute(COPY_SOURCE_SQL, {
+        "from_source": donor_id,
+        "from_workspace": donor_workspace_id,
+        "to_source": source.id,
+        "workspace_id": source.workspace_id,
+        "filename": source.filename,
+    })
+    return True
+
+async def _delete_documents(db: AsyncSession, workspace_id: str, document_ids: List[str]):
+    # chunks.document_id has no ON DELETE CASCADE, so chunks go first. Every chunk
+    # statement names the workspace, so it touches one partition instead of all.
+    for i in range(0, len(document_ids), 1000):
+        ids = document_ids[i:i + 1000]
+        await db.execute(
+            delete(models.Chunk)
+            .where(models.Chunk.workspace_id == workspace_id)
+            .where(models.Chunk.document_id.in_(ids))
         )
-        db.add(chunk)
+        await db.execute(delete(models.Document).where(models.Document.id.in_(ids)))
 
-async def _process_url(source: models.Source, db: AsyncSession):
-    response = requests.get(source.url, timeout=10)
-    response.raise_for_status()
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.extract()
-    
-    text = soup.get_text()
-    
-    doc = models.Document(
-        source_id=source.id,
-        doc_type="page",
-        metadata_={"url": source.url, "title": soup.title.string if soup.title else source.title}
+async def _sync_chunks(document_id: str, cleaned: str, db: AsyncSession, batch: ChunkBatch):
+    # Chunk-level diff against what is stored for this document: chunks whose text
+    # is unchanged stay in place (only re-indexed if they moved), new or modified
+    # ones are embedded and written, and the rest are deleted.
+    in_document = (models.Chunk.workspace_id == batch.workspace_id, models.Chunk.document_id == document_id)
+    result = await db.execute(
+        select(models.Chunk.id, models.Chunk.chunk_index, models.Chunk.content_hash).where(*in_document)
     )
-    db.add(doc)
-    await db.flush() # get doc.id
-    
-    await _create_chunks(doc, text, db)
+    existing: Dict[str, List[Any]] = {}
+    for chunk_id, chunk_index, chunk_hash in result.all():
+        existing.setdefault(chunk_hash, []).append((chunk_id, chunk_index))
+
+    moved = []
+    for i, text in enumerate(_chunk_text(cleaned)):
+        matches = existing.get(content_hash(text))
+        if matches:
+            chunk_id, old_index = matches.pop()
+            if old_index != i:
+                moved.append({"chunk_id": chunk_id, "new_index": i})
+        else:
+            await batch.add(document_id, i, text)
+
+    stale = [chunk_id for matches in existing.values() for chunk_id, _ in matches]
+    for i in range(0, len(stale), 1000):
+        await db.execute(delete(models.Chunk).where(*in_document).where(models.Chunk.id.in_(stale[i:i + 1000])))
+    if moved:
+        # Core executemany on the table: the ORM's bulk update by primary key would
+        # match on id alone
+        chunks = models.Chunk.__table__
+        await db.execute(
+            update(chunks)
+            .where(chunks.c.workspace_id == batch.workspace_id)
+            .where(chunks.c.id == bindparam("chunk_id"))
+            .values(chunk_index=bindparam("new_index")),
+            moved,
+        )
 
-async def _process_note(source: models.Source, db: AsyncSession):
+async def _sync_document(source: models.Source, doc_type: str, metadata: dict, raw_text: str, db: AsyncSession, batch: ChunkBatch):
+    # Single-document sources (url, note, pdf): reuse the stored document and
+    # diff its chunks instead of rebuilding everything.
+    cleaned = clean_text(raw_text)
+    doc_hash = _document_hash(metadata, cleaned)
+
+    result = await db.execute(select(models.Document).where(models.Document.source_id == source.id))
+    existing = result.scalars().all()
+
+    if len(existing) == 1:
+        doc = existing[0]
+        if doc.content_hash == doc_hash:
+            return
+        doc.doc_type = doc_type
+        doc.metadata_ = metadata
+        doc.content_hash = doc_hash
+        batch.stats.documents += 1
+        await _sync_chunks(doc.id, cleaned, db, batch)
+        return
+
+    if existing:
+        await _delete_documents(db, source.workspace_id, [d.id for d in existing])
     doc = models.Document(
+        id=models.generate_uuid(),
         source_id=source.id,
-        doc_type="note",
-        metadata_={"title": source.title}
+        doc_type=doc_type,
+        metadata_=metadata,
+        content_hash=doc_hash
     )
     db.add(doc)
     await db.flush()
+    batch.stats.documents += 1
+    
+    await _add_chunks(doc.id, cleaned, batch)
+
+def _parse_html(html: str):
+    # CPU-bound; runs in a thread
+    soup = BeautifulSoup(html, 'html.parser')
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.extract()
+    return (soup.title.string if soup.title else None), soup.get_text()
+
+async def _process_url(source: models.Source, db: AsyncSession, batch: ChunkBatch, previous: Optional[str] = None) -> str:
+    # Conditional GET: unchanged pages come back as 304 and are served from the HTTP cache
+    with batch.stats.stage("fetch"):
+        response = await get_fetcher().fetch(source.url)
+    batch.stats.bytes_in = len(response.text.encode("utf-8"))
+    fingerprint = _versioned(content_hash(response.text))
+    if fingerprint == previous:
+        return fingerprint
     
-    await _create_chunks(doc, source.raw_text, db)
+    with batch.stats.stage("parse"):
+        title, text = await asyncio.to_thread(_parse_html, response.text)
+    metadata = {"url": source.url, "title": title or source.title}
+    await _sync_document(source, "page", metadata, text, db, batch)
+    return fingerprint
+
+async def _process_note(source: models.Source, db: AsyncSession, batch: ChunkBatch, previous: Optional[str] = None) -> str:
+    batch.stats.bytes_in = len((source.raw_text or "").encode("utf-8"))
+    fingerprint = _versioned(content_hash(source.raw_text or ""))
+    if fingerprint == previous:
+        return fingerprint
+
+    await _sync_document(source, "note", {"title": source.title}, source.raw_text, db, batch)
+    return fingerprint
 
-async def _process_pdf(source: models.Source, db: AsyncSession):
+async def _process_pdf(source: models.Source, db: AsyncSession, batch: ChunkBatch, previous: Optional[str] = None) -> str:
     # Depending on how raw_text is stored for file uploads (path vs content)
     # In routers/sources.py we stored "loc:/path/to/file"
     file_path = source.raw_text.replace("loc:", "")
+    batch.stats.bytes_in = os.path.getsize(file_path)
+    with batch.stats.stage("fetch"):
+        file_hash = await _file_source_fingerprint(source, file_path)
+    fingerprint = _versioned(file_hash)
+    if fingerprint == previous:
+        return fingerprint
+    if await _copy_identical_upload(source, db, file_hash, fingerprint):
+        batch.stats.outcome = "copied"
+        return fingerprint
     
-    text_content = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text_content += page.extract_text() or ""
+    # Pages are extracted in a process pool and arrive in order
+    with batch.stats.stage("parse"):
+        pages = [text async for text in iter_pdf_pages(file_path)]
+    text_content = "".join(pages)
             
-    doc = models.Document(
-        source_id=source.id,
-        doc_type="report",
-        metadata_={"filename": source.filename}
-    )
-    db.add(doc)
-    await db.flush()
-    
-    await _create_chunks(doc, text_content, db)
+    await _sync_document(source, "report", {"filename": source.filename}, text_content, db, batch)
+    return fingerprint
+
+# Columns checked (in order) for the main text of each CSV row
+CSV_TEXT_COLUMNS = ['review', 'text', 'content', 'body', 'review_text']
 
-async def _process_csv(source: models.Source, db: AsyncSession):
+def _csv_frame_contents(frame: pd.DataFrame, text_col: Optional[str]) -> pd.Series:
+    # Cleaned main text for every row of a CSV frame, computed column-wise
+    if text_col is not None:
+        col = frame[text_col]
+        has_text = col.map(lambda v: isinstance(v, str) and v != "")
+        contents = col.where(has_text).astype(object)
+    else:
+        has_text = pd.Series(False, index=frame.index)
+        contents = pd.Series("", index=frame.index, dtype=object)
+
+    # Fallback: join all values
+    if not has_text.all():
+        contents[~has_text] = frame[~has_text].astype(str).agg(" ".join, axis=1)
+
+    return contents.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+def _read_csv_frame(reader, text_col: Optional[str]):
+    # Next frame's metadata records and cleaned texts, or None at end of file
+    frame = next(reader, None)
+    if frame is None:
+        reader.close()
+        return None
+    contents = _csv_frame_contents(frame, text_col)
+    # Metadata as plain Python values, with missing cells stored as null
+    records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+    return records, contents
+
+async def _process_csv(source: models.Source, db: AsyncSession, batch: ChunkBatch, previous: Optional[str] = None) -> str:
     file_path = source.raw_text.replace("loc:", "")
-    df = pd.read_csv(file_path)
-    
-    # Flexible column handling: look for 'review' or 'text' or assume all columns
-    # We will treat each row as a document
-    
-    for _, row in df.iterrows():
-        # Convert row to dict for metadata
-        row_data = row.to_dict()
-        
-        # Try to find main text content
-        content = ""
-        possible_text_cols = ['review', 'text', 'content', 'body', 'review_text']
-        for col in possible_text_cols:
-            if col in row_data and isinstance(row_data[col], str):
-                content = row_data[col]
-                break
-        
-        if not content:
-            # Fallback: join all values
-            content = " ".join([str(v) for v in row_data.values()])
-            
-        doc = models.Document(
-            source_id=source.id,
-            doc_type="review",
-            metadata_=row_data
-        )
-        db.add(doc)
-        await db.flush()
-        
-        await _create_chunks(doc, content, db)
+    batch.stats.bytes_in = os.path.getsize(file_path)
+    with batch.stats.stage("fetch"):
+        file_hash = await _file_source_fingerprint(source, file_path)
+    fingerprint = _versioned(file_hash)
+    if fingerprint == previous:
+        return fingerprint
+    if await _copy_identical_upload(source, db, file_hash, fingerprint):
+        batch.stats.outcome = "copied"
+        return fingerprint
+
+    # Rows already stored (by row hash) are left alone; whatever is not seen
+    # again in the file is deleted at the end.
+    result = await db.execute(
+        select(models.Document.id, models.Document.content_hash)
+        .where(models.Document.source_id == source.id)
+    )
+    existing: Dict[Optional[str], List[str]] = {}
+    for doc_id, doc_hash in result.all():
+        existing.setdefault(doc_hash, []).append(doc_id)
+
+    # Flexible column handling: look for 'review' or 'text' etc. once per file,
+    # otherwise (or for rows where it is empty) join all values.
+    # We will treat each row as a document.
+    header = pd.read_csv(file_path, nrows=0).columns
+    text_col = next((c for c in CSV_TEXT_COLUMNS if c in header), None)
+
+    # Stream the file in fixed-size frames so memory stays bounded by CSV_CHUNK_ROWS;
+    # each frame is parsed in a thread while the loop serves other sources
+    reader = pd.read_csv(file_path, chunksize=settings.CSV_CHUNK_ROWS)
+    while True:
+        with batch.stats.stage("parse"):
+            parsed = await asyncio.to_thread(_read_csv_frame, reader, text_col)
+        if parsed is None:
+            break
+        records, contents = parsed
+
+        doc_rows = []
+        doc_contents = []
+        for record, content in zip(records, contents):
+            doc_hash = _document_hash(record, content)
+            if existing.get(doc_hash):
+                existing[doc_hash].pop()
+                continue
+            doc_rows.append({
+                "id": models.generate_uuid(),
+                "source_id": source.id,
+                "doc_type": "review",
+                "metadata_": record,
+                "content_hash": doc_hash,
+            })
+            doc_contents.append(content)
+
+        if doc_rows:
+            await db.execute(insert(models.Document), doc_rows)
+            batch.stats.documents += len(doc_rows)
+
+        for doc_row, content in zip(doc_rows, doc_contents):
+            await _add_chunks(doc_row["id"], content, batch)
+
+    stale = [doc_id for doc_ids in existing.values() for doc_id in doc_ids]
+    if stale:
+        await _delete_documents(db, source.workspace_id, stale)
+    return fingerprint
@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from apps.api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ONNX Runtime version of the sentence-transformers pipeline (transformer -> pooling
+# -> optional normalize). The model is exported once per name into EMBEDDING_ONNX_DIR,
+# with an int8 dynamically quantized copy next to it; after that only the tokenizer
+# and the ONNX session are loaded, not the torch model.
+#
+# onnx / onnxruntime are optional and only imported when this backend is selected.
+
+INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+def export_dir(model_name: str, root: Optional[str] = None) -> str:
+    safe_name = model_name.strip("/").replace("/", "__")
+    return os.path.join(root or settings.EMBEDDING_ONNX_DIR, safe_name)
+
+def export_model(model_name: str, out_dir: str, quantize: bool = True):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0]
+    pooling = next((m for m in st if isinstance(m, Pooling)), None)
+
+    os.makedirs(out_dir, exist_ok=True)
+    transformer.tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, "pipeline.json"), "w") as f:
+        json.dump({
+            "max_seq_length": transformer.max_seq_length,
+            "pooling": "cls" if pooling is not None and pooling.pooling_mode_cls_token else "mean",
+            "normalize": any(isinstance(m, Normalize) for m in st),
+        }, f)
+
+    class _LastHiddenState(torch.nn.Module):
+        # Only the token embeddings are needed; pooling happens in numpy
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(names, inputs)))[0]
+
+    sample = transformer.tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in INPUT_NAMES if n in sample]
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    torch.onnx.export(
+        _LastHiddenState(transformer.auto_model.eval()),
+        tuple(sample[n] for n in names),
+        fp32_path,
+        input_names=names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={n: {0: "batch", 1: "sequence"} for n in names + ["last_hidden_state"]},
+        opset_version=14,
+        dynamo=False,
+    )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(out_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+class OnnxEmbedder:
+    # Drop-in for SentenceTransformer.encode on CPU
+    def __init__(self, model_name: str, quantize: bool = True, root: Optional[str] = None, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = export_dir(model_name, root)
+        model_file = "model.int8.onnx" if quantize else "model.onnx"
+        if not os.path.exists(os.path.join(path, model_file)):
+            logger.info("Exporting %s to ONNX in %s", model_name, path)
+            export_model(model_name, path, quantize=quantize)
+
+        with open(os.path.join(path, "pipeline.json")) as f:
+            pipeline = json.load(f)
+        self.max_seq_length = pipeline["max_seq_length"]
+        self.pooling = pipeline["pooling"]
+        self.normalize = pipeline["normalize"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(path, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feed = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feed)[0]
+
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Batch texts of similar length together to keep padding down, as sentence-transformers does
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            for i, vector in zip(idx, self._encode_batch([texts[i] for i in idx])):
+                out[i] = vector
+        return np.stack(out)
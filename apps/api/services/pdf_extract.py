@@ -0,0 +1,76 @@
+import asyncio
+import os
+from typing import AsyncIterator, List, Optional
+
+import billiard
+import pdfplumber
+from billiard.pool import Pool
+
+from apps.api.core.config import settings
+
+# Kept free of heavy imports: with the spawn start method every pool worker
+# imports this module, and it should not drag the embedding model along.
+
+_pool: Optional[Pool] = None
+_pool_pid: Optional[int] = None
+
+def _get_pool() -> Optional[Pool]:
+    # billiard (Celery's multiprocessing fork) lets Celery's daemonic prefork
+    # children start this pool, which the stdlib process pools refuse to do.
+    # A pool inherited through fork belongs to the parent, so each process starts
+    # its own. With a single worker, extraction runs on the default thread pool.
+    global _pool, _pool_pid
+    workers = settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = billiard.get_context("spawn").Pool(processes=workers)
+        _pool_pid = os.getpid()
+    return _pool
+
+def _submit(pool: Optional[Pool], fn, *args) -> asyncio.Future:
+    # An asyncio future for fn(*args) run in the pool; billiard reports results
+    # through callbacks on its result-handler thread
+    loop = asyncio.get_running_loop()
+    if pool is None:
+        return loop.run_in_executor(None, fn, *args)
+    future = loop.create_future()
+
+    def settle(method, value):
+        if not future.done():
+            getattr(future, method)(value)
+
+    pool.apply_async(
+        fn,
+        args,
+        callback=lambda value: loop.call_soon_threadsafe(settle, "set_result", value),
+        error_callback=lambda exc: loop.call_soon_threadsafe(settle, "set_exception", exc),
+    )
+    return future
+
+def page_count(file_path: str) -> int:
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+def extract_pages(file_path: str, start: int, end: int) -> List[str]:
+    # Runs in a pool worker; each worker opens its own handle on the file
+    with pdfplumber.open(file_path) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, end)]
+
+async def iter_pdf_pages(file_path: str) -> AsyncIterator[str]:
+    # Yields page texts in order while later page ranges are still being extracted
+    pool = _get_pool()
+    n_pages = await _submit(pool, page_count, file_path)
+
+    step = max(1, settings.PDF_PAGES_PER_TASK)
+    futures = [
+        _submit(pool, extract_pages, file_path, start, min(start + step, n_pages))
+        for start in range(0, n_pages, step)
+    ]
+    try:
+        for future in futures:
+            for text in await future:
+                yield text
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.config import settings
+from apps.api.services import ingestion
+from apps.api.services.batching import MicroBatcher
+from apps.api.services.embeddings import get_embeddings_traced
+
+logger = logging.getLogger(__name__)
+
+# Staged ingestion of many sources at once:
+#
+#   source ids -> [bounded queue] -> source workers -> [bounded queue] -> embed stage
+#                                    fetch/parse/chunk                   one executor thread,
+#                                    diff and write                      merges requests
+#
+# Each source worker owns a DB session and takes sources off the queue. Fetching,
+# parsing (HTML, CSV frames and PDF pages off the loop), chunking, diffing and
+# writing happen there, in the source's own transaction. Chunk batches go to a
+# single shared embed stage, which merges requests from all workers into one
+# get_embeddings_traced call per INGEST_EMBED_BATCH_SIZE texts. So while one source is
+# being embedded, others are fetched, parsed and written.
+#
+# Both queues are bounded. Once INGEST_EMBED_QUEUE batches are waiting, workers
+# block in submit and stop reading, so memory stays at roughly
+# INGEST_SOURCE_WORKERS batches plus the queued ones.
+
+def _embed_traced(texts: List[str]):
+    # One (vector, cache tier) pair per text, so merged batches can be split back per source
+    vectors, tiers = get_embeddings_traced(texts)
+    return list(zip(vectors, tiers))
+
+async def run_ingestion_pipeline(
+    source_ids: List[str],
+    session_factory: Callable[[], AsyncSession],
+    workers: Optional[int] = None,
+    embed_queue: Optional[int] = None,
+):
+    workers = max(1, min(workers or settings.INGEST_SOURCE_WORKERS, len(source_ids) or 1))
+    embedder = MicroBatcher(
+        _embed_traced,
+        max_batch_size=settings.INGEST_EMBED_BATCH_SIZE,
+        max_wait=settings.INGEST_EMBED_MAX_WAIT_MS / 1000,
+        max_queue=embed_queue or settings.INGEST_EMBED_QUEUE,
+    )
+    sources: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=workers * 2)
+
+    async def feed():
+        for source_id in source_ids:
+            await sources.put(source_id)
+        for _ in range(workers):
+            await sources.put(None)
+
+    async def work():
+        async with session_factory() as db:
+            while True:
+                source_id = await sources.get()
+                if source_id is None:
+                    return
+                # process_source records its own failures on the source
+                await ingestion.process_source(source_id, db, embed=embedder.submit)
+
+    embedder.start()
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(feed())
+            for _ in range(workers):
+                group.create_task(work())
+    finally:
+        await embedder.stop()
+
+    logger.info("Ingested %d sources with %d workers: %s", len(source_ids), workers, embedder.stats())
+    return embedder.stats()
@@ -5,6 +5,7 @@ import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
 
 from apps.api.db import models
+from apps.api.services.analytics import ensure_nltk_data
 
 async def calculate_scorecard(scorecard_id: str, db: AsyncSession):
     # 1. Fetch Scorecard
@@ -34,6 +35,7 @@ async def calculate_scorecard(scorecard_id: str, db: AsyncSession):
         brand = (doc.metadata_ or {}).get("brand", "Unknown")
         docs_by_brand[brand].append(doc)
         
+    ensure_nltk_data()
     sia = SentimentIntensityAnalyzer()
     
     # 5. Evaluate Per Brand
@@ -0,0 +1,319 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy import ColumnElement, Float, Select, Text, bindparam, cast, func, select, text, true
+from sqlalchemy.dialects.postgresql import ARRAY, BIT, REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.config import settings
+from apps.api.db import models
+from apps.api.services.embeddings import encoder_id, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# pgvector's accepted range for hnsw.ef_search, and its default
+MAX_EF_SEARCH = 1000
+DEFAULT_EF_SEARCH = 40
+
+async def set_search_effort(
+    db: AsyncSession, ef_search: Optional[int] = None, probes: Optional[int] = None, rows: Optional[int] = None
+):
+    # Per-request recall/latency trade-off for the vector index. SET LOCAL only
+    # lasts until the current transaction ends, so pooled connections are not
+    # left with another request's setting. SET takes no bind parameters, hence
+    # the int() before formatting. rows is how many neighbours the statement asks
+    # the index for: an HNSW scan returns at most ef_search of them, so ef_search
+    # is raised to match. The binary re-rank's Hamming pass always asks for
+    # VECTOR_BINARY_CANDIDATES.
+    ef_search = ef_search or settings.VECTOR_EF_SEARCH
+    if settings.VECTOR_BINARY_RERANK:
+        rows = max(rows or 0, settings.VECTOR_BINARY_CANDIDATES)
+    if rows and rows > (ef_search or DEFAULT_EF_SEARCH):
+        ef_search = min(rows, MAX_EF_SEARCH)
+    probes = probes or settings.VECTOR_IVFFLAT_PROBES
+    if ef_search:
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+    if probes:
+        await db.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+    if settings.VECTOR_ITERATIVE_SCAN in ("strict_order", "relaxed_order"):
+        await db.execute(text(f"SET LOCAL hnsw.iterative_scan = {settings.VECTOR_ITERATIVE_SCAN}"))
+
+def _in_workspace(stmt: Select, workspace_id: str, filters: Optional[dict]) -> Select:
+    # Filtering on chunks' own workspace_id prunes the scan to one partition and
+    # lets the planner pick the workspace index (exact) for small workspaces
+    stmt = (
+        stmt.join(models.Document, models.Chunk.document_id == models.Document.id)
+        .join(models.Source, models.Document.source_id == models.Source.id)
+        .where(models.Chunk.workspace_id == workspace_id)
+    )
+
+    # Apply Metadata Filters
+    # filters example: {"brand": "BrandA", "source_type": "url"}
+    # Note: Document metadata is JSONB, so we can filter inside it for brands etc.
+    if filters:
+        for key, value in filters.items():
+            if key == "brand":
+                # JSONB containment or specific key check
+                stmt = stmt.where(models.Document.metadata_['brand'].astext == value)
+            # Add other filters as needed
+    return stmt
+
+def _query_vector(query_embedding: List[float]) -> ColumnElement:
+    # Typed as the embedding column: binary_quantize() is overloaded per vector type
+    return cast(query_embedding, models.Chunk.embedding.type)
+
+def _binary(vector: ColumnElement) -> ColumnElement:
+    # Spelled exactly as the expression of the Hamming index from migration 011
+    return cast(func.binary_quantize(vector), BIT(models.EMBEDDING_DIM))
+
+def _nearest(workspace_id: str, query: ColumnElement, limit: int, filters: Optional[dict]) -> Select:
+    # (chunk_id, distance) of the `limit` chunks closest to the query vector. With
+    # VECTOR_BINARY_RERANK the HNSW scan runs over the 48-byte binary codes instead,
+    # and its VECTOR_BINARY_CANDIDATES nearest by Hamming distance are re-ranked by
+    # exact cosine distance. The candidates are a LIMITed derived table, so the
+    # re-rank is a sort of those rows only.
+    if not settings.VECTOR_BINARY_RERANK:
+        distance = models.Chunk.embedding.cosine_distance(query)
+        stmt = select(models.Chunk.id.label("chunk_id"), distance.label("distance"))
+        return _in_workspace(stmt, workspace_id, filters).order_by(distance).limit(limit)
+
+    hamming = _binary(models.Chunk.embedding).op("<~>", return_type=Float)(_binary(query))
+    candidates = (
+        _in_workspace(select(models.Chunk.id.label("chunk_id"), models.Chunk.embedding), workspace_id, filters)
+        .order_by(hamming)
+        .limit(max(limit, settings.VECTOR_BINARY_CANDIDATES))
+        .subquery("candidates")
+    )
+    distance = candidates.c.embedding.cosine_distance(query)
+    return select(candidates.c.chunk_id, distance.label("distance")).order_by(distance).limit(limit)
+
+def vector_search_stmt(workspace_id: str, query_embedding: List[float], limit: int, filters: Optional[dict] = None) -> Select:
+    # Rows of (Chunk, Document, Source, score), score being cosine similarity
+    nearest = _nearest(workspace_id, _query_vector(query_embedding), limit, filters).subquery("nearest")
+    stmt = (
+        select(models.Chunk, models.Document, models.Source, (1 - nearest.c.distance).label("score"))
+        .join(nearest, nearest.c.chunk_id == models.Chunk.id)
+    )
+    return _in_workspace(stmt, workspace_id, None).order_by(nearest.c.distance)
+
+def batch_vector_search_stmt(
+    workspace_id: str, query_embeddings: List[List[float]], limit: int, filters: Optional[dict] = None
+) -> Select:
+    # Several vector searches in one statement: the query vectors are unnested and
+    # each one drives its own nearest-neighbour LIMIT through a LATERAL join. Rows are
+    # (query position (1-based), Chunk, Document, Source, score), grouped by query position.
+    # Vectors travel as one text[] parameter (asyncpg has no codec for vector[]).
+    vectors = bindparam(
+        "query_embeddings",
+        ["[" + ",".join(str(float(x)) for x in e) + "]" for e in query_embeddings],
+        type_=ARRAY(Text),
+    )
+    queries = (
+        func.unnest(cast(vectors, ARRAY(models.Chunk.embedding.type)))
+        .table_valued("embedding", with_ordinality="ord")
+        .render_derived()
+        .alias("queries")
+    )
+
+    hits = _nearest(workspace_id, queries.c.embedding, limit, filters).lateral("hits")
+
+    return (
+        select(queries.c.ord, models.Chunk, models.Document, models.Source, (1 - hits.c.distance).label("score"))
+        .select_from(queries)
+        .join(hits, true())
+        .join(models.Chunk, models.Chunk.id == hits.c.chunk_id)
+        .join(models.Document, models.Chunk.document_id == models.Document.id)
+        .join(models.Source, models.Document.source_id == models.Source.id)
+        .where(models.Chunk.workspace_id == workspace_id)
+        .order_by(queries.c.ord, hits.c.distance)
+    )
+
+def chunk_hits_stmt(workspace_id: str, chunk_ids: List[str]) -> Select:
+    # (Chunk, Document, Source) rows for search hits found outside Postgres
+    stmt = select(models.Chunk, models.Document, models.Source).where(models.Chunk.id.in_(chunk_ids))
+    return _in_workspace(stmt, workspace_id, None)
+
+def hybrid_candidates(limit: int, candidates: Optional[int] = None) -> int:
+    # Rows taken from each side of a hybrid search before fusing
+    return max(limit, candidates or settings.SEARCH_HYBRID_CANDIDATES)
+
+def hybrid_search_stmt(
+    workspace_id: str,
+    query: str,
+    query_embedding: List[float],
+    limit: int,
+    filters: Optional[dict] = None,
+    candidates: Optional[int] = None,
+) -> Select:
+    # Full-text and ANN search merged with reciprocal rank fusion, in one statement.
+    # Each side is cut to its top `candidates` before fusing: the vector side is an
+    # ordinary nearest-neighbour LIMIT and the text side a GIN lookup, so the cost stays
+    # close to vector-only search. Rows are (Chunk, Document, Source, score) with
+    # score = sum of 1 / (SEARCH_RRF_K + rank) over the sides that found the chunk.
+    k = hybrid_candidates(limit, candidates)
+
+    vector_top = _nearest(workspace_id, _query_vector(query_embedding), k, filters).subquery()
+    vector_ranked = select(
+        vector_top.c.chunk_id, func.row_number().over(order_by=vector_top.c.distance).label("rank")
+    ).cte("vector_ranked")
+
+    # websearch_to_tsquery accepts arbitrary user input ("quoted phrases", -exclusions)
+    ts_query = func.websearch_to_tsquery(cast(models.TEXT_SEARCH_CONFIG, REGCONFIG), query)
+    text_score = func.ts_rank_cd(models.Chunk.text_search, ts_query)
+    text_top = (
+        _in_workspace(select(models.Chunk.id.label("chunk_id"), text_score.label("text_score")), workspace_id, filters)
+        .where(models.Chunk.text_search.bool_op("@@")(ts_query))
+        .order_by(text_score.desc())
+        .limit(k)
+        .subquery()
+    )
+    text_ranked = select(
+        text_top.c.chunk_id, func.row_number().over(order_by=text_top.c.text_score.desc()).label("rank")
+    ).cte("text_ranked")
+
+    rrf_k = settings.SEARCH_RRF_K
+    fused_score = cast(
+        func.coalesce(1.0 / (rrf_k + vector_ranked.c.rank), 0) + func.coalesce(1.0 / (rrf_k + text_ranked.c.rank), 0),
+        Float,
+    )
+    fused = (
+        select(
+            func.coalesce(vector_ranked.c.chunk_id, text_ranked.c.chunk_id).label("chunk_id"),
+            fused_score.label("score"),
+        )
+        .select_from(vector_ranked.join(text_ranked, vector_ranked.c.chunk_id == text_ranked.c.chunk_id, full=True))
+        .order_by(fused_score.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+    # Chunk ids are only unique together with workspace_id (the partition key), so the
+    # lookup of the fused ids is kept to the workspace's partition as well
+    stmt = select(models.Chunk, models.Document, models.Source, fused.c.score).join(
+        fused, fused.c.chunk_id == models.Chunk.id
+    )
+    return _in_workspace(stmt, workspace_id, None).order_by(fused.c.score.desc())
+
+class SearchResultCache:
+    # Redis cache of search responses. Each workspace has a generation counter that
+    # ingestion bumps whenever its chunks change; entries record the generation they
+    # were computed at and are ignored once it moves on, so nothing has to be found
+    # and deleted. A lookup is one MGET of (generation, entry).
+    def __init__(self, client: Optional[redis.Redis], ttl: int):
+        # client=None uses the shared connection from get_redis_client()
+        self._client = client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+
+    @staticmethod
+    def generation_key(workspace_id: str) -> str:
+        return f"search:gen:{workspace_id}"
+
+    def key(self, workspace_id: str, params: Dict[str, Any]) -> str:
+        # The encoder is part of the key: a different model or backend ranks differently
+        payload = json.dumps([encoder_id(), params], sort_keys=True, default=str)
+        digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16)
+        return f"search:{workspace_id}:{digest.hexdigest()}"
+
+    def get(self, workspace_id: str, params: Dict[str, Any]) -> Tuple[Optional[List[dict]], int]:
+        # Cached results (None on a miss) and the current generation, which the
+        # caller passes back to set() so a result computed while ingestion was
+        # bumping the counter is stored as already stale
+        if not self.ttl:
+            return None, 0
+        try:
+            generation, entry = self.client.mget([self.generation_key(workspace_id), self.key(workspace_id, params)])
+        except redis.RedisError as e:
+            logger.warning("Search cache read failed: %s", e)
+            self.errors += 1
+            return None, 0
+
+        generation = int(generation or 0)
+        if entry:
+            cached = json.loads(entry)
+            if cached["generation"] == generation:
+                self.hits += 1
+                return cached["results"], generation
+        self.misses += 1
+        return None, generation
+
+    def get_many(self, workspace_id: str, params: List[Dict[str, Any]]) -> Tuple[List[Optional[List[dict]]], int]:
+        # Batch form of get(): one MGET for the generation and every entry
+        if not self.ttl or not params:
+            return [None] * len(params), 0
+        try:
+            values = self.client.mget(
+                [self.generation_key(workspace_id)] + [self.key(workspace_id, p) for p in params]
+            )
+        except redis.RedisError as e:
+            logger.warning("Search cache read failed: %s", e)
+            self.errors += 1
+            return [None] * len(params), 0
+
+        generation = int(values[0] or 0)
+        results: List[Optional[List[dict]]] = []
+        for entry in values[1:]:
+            cached = json.loads(entry) if entry else None
+            results.append(cached["results"] if cached and cached["generation"] == generation else None)
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(params) - hits
+        return results, generation
+
+    def set(self, workspace_id: str, params: Dict[str, Any], generation: int, results: List[dict]):
+        self.set_many(workspace_id, [(params, results)], generation)
+
+    def set_many(self, workspace_id: str, entries: List[Tuple[Dict[str, Any], List[dict]]], generation: int):
+        if not self.ttl or not entries:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for params, results in entries:
+                pipe.set(
+                    self.key(workspace_id, params),
+                    json.dumps({"generation": generation, "results": results}),
+                    ex=self.ttl,
+                )
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Search cache write failed: %s", e)
+            self.errors += 1
+
+    def generation(self, workspace_id: str) -> Optional[int]:
+        # The workspace's current generation, or None when Redis cannot say
+        try:
+            return int(self.client.get(self.generation_key(workspace_id)) or 0)
+        except redis.RedisError as e:
+            logger.warning("Search generation read failed for workspace %s: %s", workspace_id, e)
+            self.errors += 1
+            return None
+
+    def bump(self, workspace_id: str):
+        # Invalidates every cached search for the workspace
+        try:
+            self.client.incr(self.generation_key(workspace_id))
+        except redis.RedisError as e:
+            logger.warning("Search cache invalidation failed for workspace %s: %s", workspace_id, e)
+            self.errors += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+search_cache = SearchResultCache(None, ttl=settings.SEARCH_CACHE_TTL)
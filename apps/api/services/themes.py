@@ -24,7 +24,7 @@ async def extract_themes(workspace_id: str, db: AsyncSession, n_clusters: int =
         return
         
     chunks = [row[0] for row in rows]
-    embeddings = [c.embedding for c in chunks]
+    embeddings = [models.embedding_array(c.embedding) for c in chunks]
     
     # Need enough samples
     if len(embeddings) < n_clusters:
@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from apps.api.core.config import settings
+
+class UploadTooLargeError(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+class InvalidUploadError(Exception):
+    pass
+
+@dataclass
+class SavedUpload:
+    path: str
+    size: int
+    content_hash: str # sha256 hex of the file bytes
+
+@dataclass
+class ReceivedUpload:
+    # Form fields of the request and its one file, saved under a temporary name in
+    # the upload directory; the caller renames it into place or removes it
+    fields: Dict[str, str]
+    filename: str
+    file: SavedUpload
+
+# Plain form fields (workspace id, title) are small; anything bigger is not ours
+MAX_FIELD_BYTES = 64 * 1024
+
+@dataclass
+class _Part:
+    headers: Dict[bytes, bytes] = field(default_factory=dict)
+    name: Optional[str] = None
+    filename: Optional[str] = None
+    data: bytes = b""
+
+class _FormState:
+    # python-multipart callbacks. They run synchronously inside parser.write(), so
+    # file data is only queued here and written by receive_upload in a thread.
+    def __init__(self):
+        self.part = _Part()
+        self.header_name = b""
+        self.header_value = b""
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.size = 0
+
+    def on_part_begin(self):
+        self.part = _Part()
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.part.headers[self.header_name.lower()] = self.header_value
+        self.header_name = self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.part.headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise InvalidUploadError("Form part without a name")
+        self.part.name = options[b"name"].decode("utf-8", "replace")
+        if b"filename" in options:
+            if self.filename is not None:
+                raise InvalidUploadError("Only one file can be uploaded per request")
+            self.filename = self.part.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.part.filename is not None:
+            self.pending.append(data[start:end])
+            self.pending_bytes += end - start
+            self.size += end - start
+            return
+        self.part.data += data[start:end]
+        if len(self.part.data) > MAX_FIELD_BYTES:
+            raise InvalidUploadError(f"Form field {self.part.name!r} is too large")
+
+    def on_part_end(self):
+        if self.part.filename is None:
+            self.fields[self.part.name] = self.part.data.decode("utf-8", "replace")
+
+    def callbacks(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in (
+                "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+                "on_headers_finished", "on_part_data", "on_part_end",
+            )
+        }
+
+async def receive_upload(
+    stream: AsyncIterator[bytes],
+    content_type: str,
+    directory: str,
+    content_length: Optional[int] = None,
+    max_bytes: int = None,
+    block_size: int = None,
+) -> ReceivedUpload:
+    # Parses a multipart/form-data body straight from the request stream: the file
+    # part is hashed and written to a temporary file in `directory` as it arrives,
+    # with disk writes batched into block_size blocks and run in a thread. Nothing
+    # is spooled first, so the size limit (on the whole body) applies before any
+    # data is buffered: to the declared Content-Length up front, and to the bytes
+    # actually received while streaming. The partial file is removed on any error.
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    block_size = block_size or settings.UPLOAD_BLOCK_BYTES
+    if content_length is not None and content_length > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    _, params = parse_options_header(content_type or "")
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data body")
+
+    state = _FormState()
+    parser = MultipartParser(boundary, state.callbacks())
+    digest = hashlib.sha256()
+
+    def _write(out, blocks: List[bytes]):
+        for block in blocks:
+            out.write(block)
+            digest.update(block)
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            received = 0
+            async for chunk in stream:
+                received += len(chunk)
+                if received > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                parser.write(chunk)
+                if state.pending_bytes >= block_size:
+                    blocks, state.pending, state.pending_bytes = state.pending, [], 0
+                    await asyncio.to_thread(_write, out, blocks)
+            parser.finalize()
+            if state.pending:
+                await asyncio.to_thread(_write, out, state.pending)
+        if state.filename is None:
+            raise InvalidUploadError("No file in the upload")
+    except MultipartParseError as e:
+        os.unlink(tmp_path)
+        raise InvalidUploadError(f"Malformed multipart body: {e}")
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return ReceivedUpload(
+        fields=state.fields,
+        filename=state.filename,
+        file=SavedUpload(path=tmp_path, size=state.size, content_hash=digest.hexdigest()),
+    )
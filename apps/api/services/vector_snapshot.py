@@ -0,0 +1,134 @@
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.config import settings
+from apps.api.db import models
+from apps.api.services.search import search_cache
+
+logger = logging.getLogger(__name__)
+
+# Exact in-memory search for workspaces up to VECTOR_MEMORY_MAX_CHUNKS chunks. Each
+# snapshot is a contiguous, L2-normalized float32 matrix plus the matching chunk ids,
+# saved as .npy files under VECTOR_SNAPSHOT_DIR/<workspace>/<generation>/ and
+# memory-mapped by the API. The generation is the search cache's workspace counter
+# read before the chunks were, so a snapshot is only used while nothing has been
+# ingested since it was built; otherwise search falls back to pgvector.
+
+def snapshot_dir(workspace_id: str, generation: int, root: Optional[str] = None) -> str:
+    return os.path.join(root or settings.VECTOR_SNAPSHOT_DIR, workspace_id, str(generation))
+
+def write_snapshot(path: str, ids: Sequence[str], vectors: np.ndarray):
+    # Written to a temporary directory and renamed into place, so readers never see
+    # a partial snapshot
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.clip(norms, 1e-12, None)
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    np.save(os.path.join(tmp_path, "vectors.npy"), vectors)
+    np.save(os.path.join(tmp_path, "ids.npy"), np.array(list(ids), dtype=np.bytes_))
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp_path, path)
+
+class WorkspaceVectorIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, queries: Sequence[Sequence[float]], k: int) -> List[List[Tuple[str, float]]]:
+        # Exact top-k by cosine similarity for each query: one matrix multiply, then
+        # argpartition so only the k winners per query are sorted
+        q = np.asarray(queries, dtype=np.float32)
+        q /= np.clip(np.linalg.norm(q, axis=1, keepdims=True), 1e-12, None)
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(q))]
+
+        scores = q @ self.vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(self.ids[i].decode(), float(s)) for i, s in zip(row, row_scores)]
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+_indexes: "OrderedDict[str, WorkspaceVectorIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def get_index(workspace_id: str, root: Optional[str] = None) -> Optional[WorkspaceVectorIndex]:
+    # The workspace's snapshot if one exists for its current generation
+    if not settings.VECTOR_MEMORY_MAX_CHUNKS:
+        return None
+    generation = search_cache.generation(workspace_id)
+    if generation is None:
+        return None
+    path = snapshot_dir(workspace_id, generation, root)
+
+    with _indexes_lock:
+        index = _indexes.get(workspace_id)
+        if index is not None and index.path == path:
+            _indexes.move_to_end(workspace_id)
+            return index
+        if not os.path.exists(path):
+            return None
+        index = WorkspaceVectorIndex(path)
+        _indexes[workspace_id] = index
+        _indexes.move_to_end(workspace_id)
+        # Only the mappings are dropped; the page cache decides what stays in memory
+        while len(_indexes) > settings.VECTOR_MEMORY_MAX_WORKSPACES:
+            _indexes.popitem(last=False)
+        return index
+
+async def refresh_snapshot(db: AsyncSession, workspace_id: str, root: Optional[str] = None) -> Optional[str]:
+    # Rebuilds the workspace's snapshot from Postgres and removes older ones.
+    # Workspaces over the size limit get no snapshot and are served by pgvector.
+    generation = search_cache.generation(workspace_id)
+    if generation is None:
+        return None
+    workspace_root = os.path.join(root or settings.VECTOR_SNAPSHOT_DIR, workspace_id)
+
+    in_workspace = (models.Chunk.workspace_id == workspace_id, models.Chunk.embedding.isnot(None))
+    count = (await db.execute(select(func.count()).select_from(models.Chunk).where(*in_workspace))).scalar_one()
+
+    path = None
+    if 0 < count <= settings.VECTOR_MEMORY_MAX_CHUNKS:
+        ids: List[str] = []
+        vectors = np.empty((count, models.EMBEDDING_DIM), dtype=np.float32)
+        # Read as float32 vectors whatever VECTOR_STORAGE is
+        as_vector = cast(models.Chunk.embedding, Vector(models.EMBEDDING_DIM))
+        result = await db.stream(
+            select(models.Chunk.id, as_vector).where(*in_workspace).execution_options(yield_per=5000)
+        )
+        async for chunk_id, embedding in result:
+            # Chunks written after the count are left for the next refresh
+            if len(ids) == count:
+                break
+            vectors[len(ids)] = embedding
+            ids.append(chunk_id)
+        path = snapshot_dir(workspace_id, generation, root)
+        write_snapshot(path, ids, vectors[:len(ids)])
+        logger.info("Search snapshot for workspace %s: %d chunks at generation %d", workspace_id, len(ids), generation)
+
+    if os.path.isdir(workspace_root):
+        for name in os.listdir(workspace_root):
+            if name != str(generation):
+                shutil.rmtree(os.path.join(workspace_root, name), ignore_errors=True)
+    return path
@@ -0,0 +1,41 @@
+import asyncio
+import numpy as np
+import pytest
+from apps.api.embedding_server import MicroBatcher
+
+@pytest.mark.asyncio
+async def test_micro_batcher_merges_concurrent_requests():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype="<f4")
+
+    batcher = MicroBatcher(encode, max_batch_size=64, max_wait=0.05)
+    batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit(["a"]),
+            batcher.submit(["bb", "ccc"]),
+            batcher.submit(["dddd"]),
+        )
+    finally:
+        await batcher.stop()
+
+    assert len(calls) == 1
+    assert calls[0] == ["a", "bb", "ccc", "dddd"]
+    assert [r[:, 0].tolist() for r in results] == [[1.0], [2.0, 3.0], [4.0]]
+    assert batcher.stats()["batches"] == 1
+
+@pytest.mark.asyncio
+async def test_micro_batcher_propagates_encode_errors():
+    def encode(texts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(encode, max_batch_size=64, max_wait=0.01)
+    batcher.start()
+    try:
+        with pytest.raises(RuntimeError):
+            await batcher.submit(["a"])
+    finally:
+        await batcher.stop()
@@ -0,0 +1,96 @@
+import pytest
+from apps.api.services.embeddings import EmbeddingCache, LRUEmbeddingCache
+
+class _FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def set(self, key, value, ex=None):
+        self.ops.append((key, value))
+
+    def execute(self):
+        self.store.update(self.ops)
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.mget_calls = 0
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self.store)
+
+def test_cache_keys_are_fixed_size_and_model_scoped():
+    a = EmbeddingCache(_FakeRedis(), "model-a", ttl=60)
+    b = EmbeddingCache(_FakeRedis(), "model-b", ttl=60)
+
+    assert len(a.key("short")) == len(a.key("long text " * 500))
+    assert a.key("same text") != b.key("same text")
+
+def test_encoder_id_covers_backend_and_quantization(monkeypatch):
+    from apps.api.services import embeddings
+
+    from apps.api.services.search import search_cache
+
+    ids, search_keys = set(), set()
+    for backend, quantize in (("torch", True), ("onnx", True), ("onnx", False)):
+        monkeypatch.setattr(embeddings.settings, "EMBEDDING_BACKEND", backend)
+        monkeypatch.setattr(embeddings.settings, "EMBEDDING_ONNX_QUANTIZE", quantize)
+        ids.add(embeddings.encoder_id())
+        search_keys.add(search_cache.key("ws", {"query": "q"}))
+
+    # Neither cache serves one encoder's vectors or rankings to another
+    assert len(ids) == len(search_keys) == 3
+
+def test_cache_packs_float32():
+    packed = EmbeddingCache.pack([0.5] * 384)
+    assert len(packed) == 384 * 4
+    assert EmbeddingCache.unpack(packed) == [0.5] * 384
+
+def test_cache_round_trip_and_stats():
+    client = _FakeRedis()
+    cache = EmbeddingCache(client, "model", ttl=60)
+
+    assert cache.get_many(["a", "b"]) == [None, None]
+    cache.set_many({"a": [1.0, 2.0]})
+    assert cache.get_many(["a", "b"]) == [[1.0, 2.0], None]
+
+    # One MGET per batch regardless of size
+    assert client.mget_calls == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["hit_rate"] == pytest.approx(0.25)
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUEmbeddingCache(max_entries=2, max_bytes=1 << 20, ttl=60)
+    lru.put("a", [1.0])
+    lru.put("b", [2.0])
+    assert lru.get("a") == [1.0]
+    lru.put("c", [3.0])
+
+    # "b" was the least recently used entry
+    assert lru.get("b") is None
+    assert lru.get("a") == [1.0]
+    assert lru.get("c") == [3.0]
+    assert lru.stats()["evictions"] == 1
+
+def test_lru_respects_byte_budget():
+    entry_size = len("k0") + 384 * 4
+    lru = LRUEmbeddingCache(max_entries=100, max_bytes=entry_size * 3, ttl=60)
+    for i in range(5):
+        lru.put(f"k{i}", [0.0] * 384)
+
+    stats = lru.stats()
+    assert stats["entries"] == 3
+    assert stats["bytes"] <= entry_size * 3
+
+def test_lru_expires_entries():
+    lru = LRUEmbeddingCache(max_entries=10, max_bytes=1 << 20, ttl=0)
+    lru.put("a", [1.0])
+    assert lru.get("a") is None
+    assert lru.stats()["expirations"] == 1
@@ -0,0 +1,37 @@
+import httpx
+import pytest
+from apps.api.services.fetcher import Fetcher, HttpCache
+
+@pytest.mark.asyncio
+async def test_fetcher_revalidates_with_etag(tmp_path):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<p>hello</p>", headers={"ETag": '"v1"'})
+
+    fetcher = Fetcher(cache=HttpCache(str(tmp_path)), transport=httpx.MockTransport(handler))
+    try:
+        first = await fetcher.fetch("https://example.com/page")
+        second = await fetcher.fetch("https://example.com/page")
+    finally:
+        await fetcher.aclose()
+
+    assert seen == [None, '"v1"']
+    assert not first.not_modified
+    assert second.not_modified
+    assert second.text == "<p>hello</p>"
+
+@pytest.mark.asyncio
+async def test_fetcher_raises_on_http_errors(tmp_path):
+    fetcher = Fetcher(
+        cache=HttpCache(str(tmp_path)),
+        transport=httpx.MockTransport(lambda request: httpx.Response(404)),
+    )
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await fetcher.fetch("https://example.com/missing")
+    finally:
+        await fetcher.aclose()
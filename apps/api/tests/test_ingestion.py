@@ -1,5 +1,7 @@
 import pytest
-from apps.api.core.text_utils import clean_text, chunk_text
+from apps.api.core.text_utils import (
+    clean_text, chunk_text, iter_char_chunks, iter_sentence_chunks, iter_sentences, iter_token_chunks,
+)
 
 def test_clean_text():
     raw = "  This   is  a   messy \n string.  "
@@ -26,3 +28,256 @@ def test_chunk_text():
     
     assert len(chunks) >= 2
     assert chunks[0] == "a" * 500
+
+def _word_tokenizer(tmp_path, words):
+    # Fast WordPiece tokenizer whose vocabulary is exactly the given words
+    from transformers import BertTokenizerFast
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "."] + sorted(set(words))))
+    return BertTokenizerFast(vocab_file=str(vocab))
+
+def test_iter_char_chunks_is_lazy_and_matches_chunk_text():
+    text = " ".join(f"word{i}" for i in range(2000))
+    chunks = iter_char_chunks(text)
+    assert next(chunks) == chunk_text(text)[0]
+    assert list(iter_char_chunks(text, 300, 50)) == chunk_text(text, 300, 50)
+
+def test_iter_token_chunks_respects_token_budget(tmp_path):
+    words = [f"w{i}" for i in range(50)]
+    tokenizer = _word_tokenizer(tmp_path, words)
+    text = " ".join(words * 40)
+
+    # A small window forces chunks to continue across tokenizer windows
+    chunks = list(iter_token_chunks(text, tokenizer, max_tokens=34, overlap=4, window=500))
+
+    counts = [len(tokenizer(c)["input_ids"]) for c in chunks]
+    assert max(counts) <= 34
+    assert all(n == 34 for n in counts[:-1])
+    # Consecutive chunks overlap by 4 tokens and together cover the text in order
+    assert chunks[0].split()[-4:] == chunks[1].split()[:4]
+    covered = chunks[0].split() + [w for c in chunks[1:] for w in c.split()[4:]]
+    assert covered == text.split()
+
+def test_iter_sentence_chunks_keeps_sentences_whole(tmp_path):
+    sentences = [f"s{i} " + " ".join(f"w{j}" for j in range(i % 5 + 1)) + "." for i in range(30)]
+    text = " ".join(sentences)
+    tokenizer = _word_tokenizer(tmp_path, text.replace(".", "").split())
+
+    chunks = list(iter_sentence_chunks(text, tokenizer, max_tokens=20))
+
+    assert all(len(tokenizer(c)["input_ids"]) <= 20 for c in chunks)
+    assert all(c.endswith(".") for c in chunks)
+    assert " ".join(chunks) == text
+
+    # Without a tokenizer the budget is in characters
+    assert all(len(c) <= 60 for c in iter_sentence_chunks(text, size=60))
+
+def test_iter_sentence_chunks_carries_overlap(tmp_path):
+    sentences = [f"s{i} " + " ".join(f"w{j}" for j in range(i % 5 + 1)) + "." for i in range(30)]
+    text = " ".join(sentences)
+    tokenizer = _word_tokenizer(tmp_path, text.replace(".", "").split())
+
+    chunks = list(iter_sentence_chunks(text, tokenizer, max_tokens=20, overlap=6))
+
+    assert all(len(tokenizer(c)["input_ids"]) <= 20 for c in chunks)
+    measure = lambda s: len(tokenizer(s, add_special_tokens=False)["input_ids"])
+    for prev, nxt in zip(chunks, chunks[1:]):
+        # The next chunk opens with the trailing sentences of the previous one that
+        # fit in 6 tokens, if any do
+        prev_sentences, next_sentences = list(iter_sentences(prev)), list(iter_sentences(nxt))
+        carried = [s for s in prev_sentences if s in next_sentences]
+        assert carried == next_sentences[:len(carried)]
+        assert carried == (prev_sentences[-len(carried):] if carried else [])
+        assert bool(carried) == (measure(prev_sentences[-1]) < 6)
+        assert measure(" ".join(carried)) <= 6
+
+def test_chunking_settings_change_fingerprints(monkeypatch):
+    from apps.api.services import ingestion
+
+    fingerprint = ingestion._versioned("abc")
+    doc_hash = ingestion._document_hash({"title": "t"}, "text")
+    monkeypatch.setattr(ingestion.settings, "CHUNK_OVERLAP_TOKENS", 16)
+
+    assert ingestion._versioned("abc") != fingerprint
+    assert ingestion._document_hash({"title": "t"}, "text") != doc_hash
+
+@pytest.mark.asyncio
+async def test_chunk_batch_embeds_and_writes_in_batches(monkeypatch):
+    from apps.api.services import ingestion
+
+    calls = []
+    def fake_get_embeddings_traced(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts], ["model"] * len(texts)
+    monkeypatch.setattr(ingestion, "get_embeddings_traced", fake_get_embeddings_traced)
+
+    written = []
+    async def fake_write_chunks(db, rows):
+        written.append(rows)
+    monkeypatch.setattr(ingestion, "write_chunks", fake_write_chunks)
+
+    async def fake_load_embeddings(db, hashes):
+        return {}
+    monkeypatch.setattr(ingestion, "load_embeddings", fake_load_embeddings)
+
+    batch = ingestion.ChunkBatch(db=None, size=3)
+    for i in range(5):
+        await batch.add("doc", i, "x" * (i + 1))
+
+    # First three chunks are embedded and written together once the batch is full
+    assert calls == [["x", "xx", "xxx"]]
+    assert len(written) == 1
+    await batch.flush()
+    assert calls[1] == ["xxxx", "xxxxx"]
+    assert [len(rows) for rows in written] == [3, 2]
+
+    rows = written[0] + written[1]
+    assert [r["chunk_index"] for r in rows] == [0, 1, 2, 3, 4]
+    assert [r["embedding"] for r in rows] == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert len({r["id"] for r in rows}) == 5
+
+@pytest.mark.asyncio
+async def test_chunk_batch_reuses_known_embeddings(monkeypatch):
+    from apps.api.core.text_utils import content_hash
+    from apps.api.services import ingestion
+
+    calls = []
+    def fake_get_embeddings_traced(texts):
+        calls.append(list(texts))
+        return [[0.0] for t in texts], ["redis"] * len(texts)
+    monkeypatch.setattr(ingestion, "get_embeddings_traced", fake_get_embeddings_traced)
+
+    async def fake_load_embeddings(db, hashes):
+        known = content_hash("syndicated review")
+        return {known: [9.0]} if known in hashes else {}
+    monkeypatch.setattr(ingestion, "load_embeddings", fake_load_embeddings)
+
+    written = []
+    async def fake_write_chunks(db, rows):
+        written.extend(rows)
+    monkeypatch.setattr(ingestion, "write_chunks", fake_write_chunks)
+
+    batch = ingestion.ChunkBatch(db=None, size=10)
+    await batch.add("doc", 0, "syndicated review")
+    await batch.add("doc", 1, "fresh review")
+    await batch.flush()
+
+    # Only text without a stored embedding reaches the model
+    assert calls == [["fresh review"]]
+    assert [r["embedding"] for r in written] == [[9.0], [0.0]]
+    assert (batch.reused, batch.embedded) == (1, 1)
+    assert batch.stats.chunks_written == 2
+    assert batch.stats.cache_stats()["redis_hits"] == 1
+
+def test_csv_frame_contents_picks_text_column_with_fallback():
+    import io
+    import pandas as pd
+    from apps.api.services.ingestion import _csv_frame_contents
+
+    frame = pd.read_csv(io.StringIO('brand,review_text,rating\nA,"  great   stuff ",5\nB,,3\n'))
+
+    assert _csv_frame_contents(frame, "review_text").tolist() == ["great stuff", "B nan 3"]
+    assert _csv_frame_contents(frame, None).tolist() == ["A great stuff 5", "B nan 3"]
+
+def _write_pdf(pdf_path: str, n_pages: int):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(pdf_path) as pdf:
+        for i in range(n_pages):
+            fig = plt.figure()
+            fig.text(0.1, 0.5, f"page {i}")
+            pdf.savefig(fig)
+            plt.close(fig)
+
+@pytest.mark.asyncio
+async def test_pdf_pages_are_extracted_in_order(tmp_path, monkeypatch):
+    from apps.api.core.config import settings
+    from apps.api.services.pdf_extract import iter_pdf_pages
+
+    pdf_path = str(tmp_path / "report.pdf")
+    _write_pdf(pdf_path, 5)
+
+    # Several small page ranges spread over the pool must still come back in order
+    monkeypatch.setattr(settings, "PDF_EXTRACT_WORKERS", 2)
+    monkeypatch.setattr(settings, "PDF_PAGES_PER_TASK", 2)
+    pages = [text async for text in iter_pdf_pages(pdf_path)]
+
+    assert pages == [f"page {i}" for i in range(5)]
+
+def _extract_in_child(pdf_path, queue):
+    import asyncio
+    from apps.api.core.config import settings
+    from apps.api.services import pdf_extract
+
+    async def collect():
+        return [text async for text in pdf_extract.iter_pdf_pages(pdf_path)]
+
+    settings.PDF_EXTRACT_WORKERS = 2
+    settings.PDF_PAGES_PER_TASK = 1
+    queue.put((pdf_extract._get_pool() is not None, asyncio.run(collect())))
+
+def test_pdf_pages_use_the_pool_in_daemonic_workers(tmp_path):
+    import billiard
+
+    pdf_path = str(tmp_path / "report.pdf")
+    _write_pdf(pdf_path, 3)
+
+    # Celery's prefork children are daemonic processes like this one
+    ctx = billiard.get_context("fork")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_extract_in_child, args=(pdf_path, queue), daemon=True)
+    child.start()
+    pooled, pages = queue.get(timeout=60)
+    child.join(10)
+
+    assert pooled
+    assert pages == [f"page {i}" for i in range(3)]
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+class _DiffSession:
+    # Answers the chunk lookup with stored rows and records every other statement
+    def __init__(self, stored):
+        self.stored = stored
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        if stmt.is_select:
+            return _Result(self.stored)
+        self.statements.append((stmt, params))
+
+@pytest.mark.asyncio
+async def test_sync_chunks_only_writes_changed_chunks(monkeypatch):
+    from apps.api.core.text_utils import content_hash
+    from apps.api.services import ingestion
+
+    # Stored document had chunks "a", "b", "c"; the new text is "b", "c", "d"
+    monkeypatch.setattr(ingestion, "_chunk_text", lambda text: text.split())
+    db = _DiffSession([
+        ("id-a", 0, content_hash("a")),
+        ("id-b", 1, content_hash("b")),
+        ("id-c", 2, content_hash("c")),
+    ])
+    batch = ingestion.ChunkBatch(db, size=100, workspace_id="ws")
+    await ingestion._sync_chunks("doc", "b c d", db, batch)
+
+    assert [(r["chunk_index"], r["text"]) for r in batch.pending] == [(2, "d")]
+
+    (delete_stmt, _), (update_stmt, moved) = db.statements
+    assert delete_stmt.is_delete
+    assert update_stmt.is_update
+    assert sorted(moved, key=lambda m: m["chunk_id"]) == [
+        {"chunk_id": "id-b", "new_index": 0},
+        {"chunk_id": "id-c", "new_index": 1},
+    ]
+    # Every statement is kept to the workspace's partition
+    for stmt, _ in db.statements:
+        assert "chunks.workspace_id = :workspace_id_1" in str(stmt)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+from apps.api.services.onnx_backend import OnnxEmbedder
+
+SAMPLES = [
+    "The battery easily lasts two days.",
+    "Screen cracked after a week, very disappointed",
+    "Shipping was fast",
+    "Customer support never answered my emails about the refund for the broken charger.",
+]
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    # A small randomly initialised BERT wrapped as a sentence-transformers model
+    # (transformer -> mean pooling -> normalize), so the test needs no download.
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    root = tmp_path_factory.mktemp("tiny")
+    words = sorted({w.strip(".,").lower() for s in SAMPLES for w in s.split()})
+    vocab = root / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words))
+
+    bert_dir = root / "bert"
+    BertTokenizerFast(vocab_file=str(vocab)).save_pretrained(bert_dir)
+    config = BertConfig(
+        vocab_size=5 + len(words), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(bert_dir)
+
+    transformer = models.Transformer(str(bert_dir), max_seq_length=64)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    st = SentenceTransformer(modules=[transformer, pooling, models.Normalize()], device="cpu")
+    st_dir = root / "st"
+    st.save(str(st_dir))
+    return str(st_dir), st.encode(SAMPLES, batch_size=2)
+
+def _cosines(a, b):
+    return np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+@pytest.mark.parametrize("quantize, threshold", [(False, 0.9999), (True, 0.98)])
+def test_onnx_matches_torch_embeddings(tiny_model, tmp_path, quantize, threshold):
+    model_path, expected = tiny_model
+    embedder = OnnxEmbedder(model_path, quantize=quantize, root=str(tmp_path))
+
+    vectors = embedder.encode(SAMPLES, batch_size=2)
+
+    assert vectors.shape == expected.shape
+    assert vectors.dtype == np.float32
+    assert _cosines(vectors, expected).min() > threshold
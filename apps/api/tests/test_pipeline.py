@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from apps.api.services import ingestion, pipeline
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+@pytest.mark.asyncio
+async def test_pipeline_overlaps_sources_and_merges_embeddings(monkeypatch):
+    encode_calls = []
+    def fake_get_embeddings_traced(texts):
+        encode_calls.append(list(texts))
+        return [[float(len(t))] for t in texts], ["model"] * len(texts)
+    monkeypatch.setattr(pipeline, "get_embeddings_traced", fake_get_embeddings_traced)
+
+    active = 0
+    peak = 0
+    results = {}
+    async def fake_process_source(source_id, db, embed=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01) # fetch / parse
+        results[source_id] = await embed([source_id, source_id * 2])
+        active -= 1
+    monkeypatch.setattr(ingestion, "process_source", fake_process_source)
+
+    source_ids = [f"s{i}" for i in range(12)]
+    stats = await pipeline.run_ingestion_pipeline(source_ids, _FakeSession, workers=4, embed_queue=2)
+
+    assert set(results) == set(source_ids)
+    assert results["s3"] == [([2.0], "model"), ([4.0], "model")]
+    # Bounded by the worker count, but sources did overlap
+    assert 1 < peak <= 4
+    # Batches from concurrent sources were merged into fewer encode calls
+    assert len(encode_calls) < len(source_ids)
+    assert stats["texts"] == 2 * len(source_ids)
+
+@pytest.mark.asyncio
+async def test_pipeline_surfaces_embedding_errors_to_sources(monkeypatch):
+    def failing_get_embeddings_traced(texts):
+        raise RuntimeError("model unavailable")
+    monkeypatch.setattr(pipeline, "get_embeddings_traced", failing_get_embeddings_traced)
+
+    failed = []
+    async def fake_process_source(source_id, db, embed=None):
+        try:
+            await embed(["text"])
+        except RuntimeError:
+            failed.append(source_id)
+    monkeypatch.setattr(ingestion, "process_source", fake_process_source)
+
+    await pipeline.run_ingestion_pipeline(["a", "b"], _FakeSession, workers=2)
+    assert sorted(failed) == ["a", "b"]
+
+def test_failed_batch_still_completes_the_chord_header(monkeypatch):
+    from apps.api import worker
+
+    async def failing_pipeline(source_ids, session_factory):
+        raise ConnectionError("database unavailable")
+    monkeypatch.setattr(pipeline, "run_ingestion_pipeline", failing_pipeline)
+
+    # The chord body still runs and gets the batch's sources
+    assert worker.process_source_batch.run(["a", "b"]) == ["a", "b"]
+
+def test_finalize_fails_unfinished_sources(monkeypatch):
+    from types import SimpleNamespace
+    from apps.api import worker
+    from apps.api.db import session
+    from apps.api.services import vector_snapshot
+
+    workspace = SimpleNamespace(status="processing")
+    statements = []
+
+    class _Result:
+        def all(self):
+            return [("completed", 1), ("failed", 1)]
+
+    class _Session(_FakeSession):
+        async def execute(self, statement):
+            statements.append(str(statement))
+            return _Result()
+
+        async def get(self, model, key):
+            return workspace
+
+        async def commit(self):
+            pass
+
+    async def no_snapshot(db, workspace_id):
+        return None
+    monkeypatch.setattr(session, "AsyncSessionLocal", _Session)
+    monkeypatch.setattr(vector_snapshot, "refresh_snapshot", no_snapshot)
+
+    assert worker.finalize_workspace_ingestion.run([["a"], ["b"]], "ws") == "Processed 2 sources (1 failed)"
+    assert statements[0].startswith("UPDATE sources SET status=")
+    assert workspace.status == "completed_with_errors"
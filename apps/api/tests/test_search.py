@@ -0,0 +1,200 @@
+import pytest
+from apps.api.services import search
+from apps.api.services.search import SearchResultCache
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def mget(self, keys):
+        return [self.store.get(k) for k in keys]
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def incr(self, key):
+        self.store[key] = int(self.store.get(key, 0)) + 1
+        return self.store[key]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+
+@pytest.mark.asyncio
+async def test_set_search_effort_is_transaction_local(monkeypatch):
+    monkeypatch.setattr(search.settings, "VECTOR_EF_SEARCH", None)
+    monkeypatch.setattr(search.settings, "VECTOR_IVFFLAT_PROBES", None)
+    monkeypatch.setattr(search.settings, "VECTOR_ITERATIVE_SCAN", None)
+
+    db = _RecordingSession()
+    await search.set_search_effort(db)
+    assert db.statements == []
+
+    await search.set_search_effort(db, ef_search=120, probes=8)
+    assert db.statements == ["SET LOCAL hnsw.ef_search = 120", "SET LOCAL ivfflat.probes = 8"]
+
+@pytest.mark.asyncio
+async def test_set_search_effort_falls_back_to_settings(monkeypatch):
+    monkeypatch.setattr(search.settings, "VECTOR_EF_SEARCH", 64)
+    monkeypatch.setattr(search.settings, "VECTOR_IVFFLAT_PROBES", None)
+    monkeypatch.setattr(search.settings, "VECTOR_ITERATIVE_SCAN", "relaxed_order")
+
+    db = _RecordingSession()
+    await search.set_search_effort(db)
+    assert db.statements == ["SET LOCAL hnsw.ef_search = 64", "SET LOCAL hnsw.iterative_scan = relaxed_order"]
+
+@pytest.mark.asyncio
+async def test_set_search_effort_covers_requested_rows(monkeypatch):
+    monkeypatch.setattr(search.settings, "VECTOR_EF_SEARCH", None)
+    monkeypatch.setattr(search.settings, "VECTOR_IVFFLAT_PROBES", None)
+    monkeypatch.setattr(search.settings, "VECTOR_ITERATIVE_SCAN", None)
+
+    # Hybrid search asks the index for SEARCH_HYBRID_CANDIDATES rows, more than
+    # pgvector's default ef_search of 40 would return
+    db = _RecordingSession()
+    await search.set_search_effort(db, rows=search.hybrid_candidates(5))
+    assert db.statements == [f"SET LOCAL hnsw.ef_search = {search.settings.SEARCH_HYBRID_CANDIDATES}"]
+
+    # Already enough: left alone
+    db = _RecordingSession()
+    await search.set_search_effort(db, rows=5)
+    await search.set_search_effort(db, ef_search=120, rows=50)
+    assert db.statements == ["SET LOCAL hnsw.ef_search = 120"]
+
+@pytest.mark.asyncio
+async def test_set_search_effort_covers_binary_candidates(monkeypatch):
+    monkeypatch.setattr(search.settings, "VECTOR_EF_SEARCH", None)
+    monkeypatch.setattr(search.settings, "VECTOR_IVFFLAT_PROBES", None)
+    monkeypatch.setattr(search.settings, "VECTOR_ITERATIVE_SCAN", None)
+    monkeypatch.setattr(search.settings, "VECTOR_BINARY_RERANK", True)
+    monkeypatch.setattr(search.settings, "VECTOR_BINARY_CANDIDATES", 200)
+
+    db = _RecordingSession()
+    await search.set_search_effort(db, rows=5)
+    await search.set_search_effort(db, ef_search=64)
+    await search.set_search_effort(db, ef_search=400, rows=5)
+    assert db.statements == [
+        "SET LOCAL hnsw.ef_search = 200",
+        "SET LOCAL hnsw.ef_search = 200",
+        "SET LOCAL hnsw.ef_search = 400",
+    ]
+
+def test_vector_search_filters_on_chunk_workspace():
+    from sqlalchemy.dialects import postgresql
+
+    for stmt in (
+        search.vector_search_stmt("ws", [0.0] * 384, limit=5),
+        search.hybrid_search_stmt("ws", "SKU-4471", [0.0] * 384, limit=5),
+    ):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        # The partition key, so every scan is pruned to one partition, including the
+        # outer lookup of the chunks found
+        assert "chunks.workspace_id =" in str(stmt.whereclause)
+        assert "sources.workspace_id =" not in sql
+
+def test_search_cache_hit_until_generation_bump():
+    cache = SearchResultCache(_FakeRedis(), ttl=60)
+    params = {"query": "battery life", "limit": 5, "filters": None}
+    results = [{"chunk_text": "lasts all day", "score": 0.9}]
+
+    cached, generation = cache.get("ws-1", params)
+    assert cached is None
+    cache.set("ws-1", params, generation, results)
+    assert cache.get("ws-1", params) == (results, generation)
+
+    # Different parameters or workspace are separate entries
+    assert cache.get("ws-1", {**params, "limit": 10})[0] is None
+    assert cache.get("ws-2", params)[0] is None
+
+    # Ingestion into another workspace leaves this one alone
+    cache.bump("ws-2")
+    assert cache.get("ws-1", params)[0] == results
+
+    cache.bump("ws-1")
+    cached, new_generation = cache.get("ws-1", params)
+    assert cached is None
+    assert new_generation == generation + 1
+    assert cache.stats()["hits"] == 2
+
+def test_search_cache_drops_results_computed_across_a_bump():
+    cache = SearchResultCache(_FakeRedis(), ttl=60)
+    params = {"query": "q"}
+
+    _, generation = cache.get("ws", params)
+    # Ingestion commits while the query is running
+    cache.bump("ws")
+    cache.set("ws", params, generation, [{"chunk_text": "old"}])
+    assert cache.get("ws", params)[0] is None
+
+def test_hybrid_search_bounds_each_side_to_candidates():
+    from sqlalchemy.dialects import postgresql
+
+    stmt = search.hybrid_search_stmt("ws", "SKU-4471", [0.0] * 384, limit=5, filters={"brand": "Acme"}, candidates=40)
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert "websearch_to_tsquery" in sql and "@@" in sql
+    assert "<=>" in sql
+    assert "FULL OUTER JOIN" in sql
+    # Both candidate lists are cut at 40 before fusion; the fused list at the limit
+    assert sorted(v for v in compiled.params.values() if isinstance(v, int) and v in (5, 40)) == [5, 40, 40]
+    # Filters apply to both sides
+    assert sql.count("documents.metadata ->>") == 2
+
+def test_search_cache_get_many_reads_one_generation():
+    client = _FakeRedis()
+    cache = SearchResultCache(client, ttl=60)
+    params = [{"query": "battery"}, {"query": "screen"}, {"query": "price"}]
+
+    results, generation = cache.get_many("ws", params)
+    assert results == [None, None, None]
+    cache.set_many("ws", [(params[0], [{"chunk_text": "a"}]), (params[2], [])], generation)
+
+    results, _ = cache.get_many("ws", params)
+    # An empty result list is still a hit
+    assert results == [[{"chunk_text": "a"}], None, []]
+
+    cache.bump("ws")
+    assert cache.get_many("ws", params)[0] == [None, None, None]
+
+def test_batch_search_is_one_lateral_statement():
+    from sqlalchemy.dialects import postgresql
+
+    compiled = search.batch_vector_search_stmt("ws", [[0.0] * 384, [1.0] * 384], limit=5).compile(
+        dialect=postgresql.dialect()
+    )
+    sql = str(compiled)
+
+    assert "WITH ORDINALITY" in sql
+    assert "JOIN LATERAL" in sql
+    # All query vectors go in one array parameter
+    assert len(compiled.params["query_embeddings"]) == 2
+
+def test_binary_rerank_searches_hamming_index_then_reranks(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+
+    monkeypatch.setattr(search.settings, "VECTOR_BINARY_RERANK", True)
+    monkeypatch.setattr(search.settings, "VECTOR_BINARY_CANDIDATES", 200)
+    compiled = search.vector_search_stmt("ws", [0.0] * 384, limit=5).compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    # Same expression as the index from migration 011, or the planner cannot use it
+    assert "CAST(binary_quantize(chunks.embedding) AS BIT(384)) <~>" in sql
+    assert "ORDER BY candidates.embedding <=>" in sql
+    assert sorted(v for v in compiled.params.values() if v in (5, 200)) == [5, 200]
+
+def test_embedding_array_accepts_halfvec_values():
+    from pgvector.utils import HalfVector
+    from apps.api.db.models import embedding_array
+
+    assert embedding_array(HalfVector([0.5, -1.0])).tolist() == [0.5, -1.0]
+    assert embedding_array([0.25, 2.0]).dtype.name == "float32"
@@ -0,0 +1,104 @@
+import json
+from datetime import datetime, timezone
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from apps.api.db.session import get_db
+from apps.api.main import app
+from apps.api.routers import sources
+from apps.api.routers.sources import _parse_bulk_body
+
+def test_parse_bulk_body_accepts_array_and_ndjson():
+    items = [
+        {"type": "url", "title": "Home", "url": "https://example.com/"},
+        {"type": "note", "title": "Memo", "raw_text": "Customers like the taste."},
+    ]
+    from_array = _parse_bulk_body(json.dumps(items).encode())
+    from_ndjson = _parse_bulk_body(("\n".join(json.dumps(i) for i in items) + "\n\n").encode())
+
+    for parsed in (from_array, from_ndjson):
+        assert [i.type for i in parsed] == ["url", "note"]
+        assert str(parsed[0].url) == "https://example.com/"
+        assert parsed[1].raw_text == "Customers like the taste."
+
+def test_parse_bulk_body_reports_invalid_items_by_index():
+    body = b'{"type": "note", "title": "ok", "raw_text": "x"}\n{"type": "url", "title": "bad", "url": "not a url"}\n'
+    with pytest.raises(HTTPException) as exc:
+        _parse_bulk_body(body)
+    assert exc.value.status_code == 422
+    assert exc.value.detail[0]["loc"][:2] == (1, "url")
+
+def test_parse_bulk_body_rejects_malformed_json():
+    with pytest.raises(HTTPException) as exc:
+        _parse_bulk_body(b'{"type": "note", "title": ')
+    assert exc.value.status_code == 400
+
+class _UploadSession:
+    def __init__(self, workspace=True):
+        self.workspace = workspace
+        self.added = []
+
+    async def get(self, model, key):
+        return object() if self.workspace else None
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        # Server defaults the response model needs
+        obj.status, obj.created_at = "pending", datetime.now(timezone.utc)
+
+@pytest.fixture
+def upload_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources.settings, "UPLOAD_DIR", str(tmp_path))
+    db = _UploadSession()
+    app.dependency_overrides[get_db] = lambda: db
+    yield AsyncClient(app=app, base_url="http://test"), db
+    app.dependency_overrides.clear()
+
+async def _upload(client, data: bytes, filename: str = "reviews.csv", workspace_id: str = "ws"):
+    return await client.post(
+        "/api/v1/sources/upload",
+        data={"workspace_id": workspace_id, "title": "Reviews"},
+        files={"file": (filename, data, "text/csv")},
+    )
+
+@pytest.mark.asyncio
+async def test_uploads_with_the_same_name_keep_separate_files(upload_client):
+    client, db = upload_client
+    async with client:
+        assert (await _upload(client, b"review\ngood\n")).status_code == 201
+        assert (await _upload(client, b"review\nbad\n")).status_code == 201
+
+    first, second = db.added
+    first_path, second_path = (s.raw_text.replace("loc:", "") for s in (first, second))
+    assert first_path != second_path
+    assert first.id in first_path and second.id in second_path
+    # Each source's file still matches the hash stored for it
+    assert open(first_path, "rb").read() == b"review\ngood\n"
+    assert open(second_path, "rb").read() == b"review\nbad\n"
+    assert first.content_hash != second.content_hash
+
+@pytest.mark.asyncio
+async def test_upload_limit_applies_before_the_body_is_stored(upload_client, tmp_path, monkeypatch):
+    client, db = upload_client
+    monkeypatch.setattr(sources.settings, "UPLOAD_MAX_BYTES", 1000)
+    async with client:
+        response = await _upload(client, b"x" * 5000)
+
+    assert response.status_code == 413
+    assert db.added == []
+    assert list(tmp_path.iterdir()) == []
+
+@pytest.mark.asyncio
+async def test_upload_to_unknown_workspace_leaves_no_file(upload_client, tmp_path):
+    client, db = upload_client
+    db.workspace = False
+    async with client:
+        response = await _upload(client, b"review\ngood\n")
+
+    assert response.status_code == 404
+    assert list(tmp_path.iterdir()) == []
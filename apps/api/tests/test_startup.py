@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from apps.api.main import app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Modules that must only load on first use, never when the API is imported
+HEAVY_MODULES = ["torch", "sentence_transformers", "transformers", "onnxruntime", "matplotlib", "pptx", "nltk", "sklearn"]
+
+def test_api_import_stays_light():
+    # Fresh interpreter so modules imported by other tests don't count
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import apps.api.main\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    env = {**os.environ, "EMBEDDING_WARMUP": "false"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["loaded"] == []
+    # Generous bound; importing torch alone takes several times this
+    assert report["elapsed"] < 5.0
+
+@pytest.mark.asyncio
+async def test_ready_reports_warm_up_state(monkeypatch):
+    from apps.api.services import embeddings
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        monkeypatch.setattr(embeddings, "is_ready", lambda: False)
+        assert (await ac.get("/ready")).status_code == 503
+        monkeypatch.setattr(embeddings, "is_ready", lambda: True)
+        assert (await ac.get("/ready")).status_code == 200
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_until_the_embedder_answers(monkeypatch):
+    import threading
+    from apps.api import main
+    from apps.api.services import embeddings
+
+    monkeypatch.setattr(embeddings, "_ready", threading.Event())
+    attempts = []
+    def fake_get_model():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("embedder not listening yet")
+        return SimpleNamespace(encode=lambda texts, batch_size: [[0.0]] * len(texts))
+    monkeypatch.setattr(embeddings, "use_server", lambda: False)
+    monkeypatch.setattr(embeddings, "get_model", fake_get_model)
+
+    delays = []
+    async def fake_sleep(delay):
+        delays.append(delay)
+    monkeypatch.setattr(main.asyncio, "sleep", fake_sleep)
+
+    await main._warm_up_embeddings()
+
+    assert len(attempts) == 3
+    assert delays == [1.0, 2.0]
+    assert embeddings.is_ready()
+
+def test_any_successful_encode_marks_ready(monkeypatch):
+    import threading
+    from apps.api.services import embeddings
+
+    monkeypatch.setattr(embeddings, "_ready", threading.Event())
+    monkeypatch.setattr(embeddings, "use_server", lambda: False)
+    monkeypatch.setattr(
+        embeddings, "get_model", lambda: SimpleNamespace(encode=lambda texts, batch_size: [[0.0]] * len(texts))
+    )
+
+    embeddings.encode(["query"])
+    assert embeddings.is_ready()
@@ -0,0 +1,30 @@
+import time
+from apps.api.services.telemetry import IngestionStats
+
+def test_ingestion_stats_builds_run_record():
+    stats = IngestionStats()
+    with stats.stage("fetch"):
+        time.sleep(0.01)
+    with stats.stage("embed"):
+        time.sleep(0.005)
+    with stats.stage("embed"):
+        time.sleep(0.005)
+    stats.record_tiers(["local", "redis", "model", "model"])
+    stats.bytes_in = 2048
+    stats.chunks_written = 4
+
+    run = stats.to_run("source-1", "workspace-1")
+
+    assert (run.source_id, run.workspace_id, run.status) == ("source-1", "workspace-1", "completed")
+    assert run.timings["fetch"] >= 10
+    assert run.timings["embed"] >= 10
+    assert run.duration_ms >= run.timings["fetch"] + run.timings["embed"]
+    assert abs(sum(run.timings.values()) - run.duration_ms) < 1
+    assert run.cache == {"local_hits": 1, "redis_hits": 1, "misses": 2, "hit_rate": 0.5}
+    assert (run.bytes_in, run.chunks_written) == (2048, 4)
+
+def test_ingestion_stats_marks_failures():
+    stats = IngestionStats()
+    stats.outcome = "copied"
+    run = stats.to_run("s", "w", error="boom")
+    assert (run.status, run.error_message) == ("failed", "boom")
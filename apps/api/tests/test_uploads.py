@@ -0,0 +1,65 @@
+import hashlib
+import pytest
+from apps.api.services.uploads import InvalidUploadError, UploadTooLargeError, receive_upload
+
+BOUNDARY = "----insighthub-test"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+def multipart_body(fields: dict, filename: str, data: bytes) -> bytes:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n".encode() + data + b"\r\n"
+    )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+async def chunked(body: bytes, size: int = 7000):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+@pytest.mark.asyncio
+async def test_receive_upload_streams_and_hashes(tmp_path):
+    data = b"review,rating\n" + b"great product,5\n" * 10000
+    body = multipart_body({"workspace_id": "ws", "title": "Reviews"}, "reviews.csv", data)
+    directory = tmp_path / "uploads"
+
+    received = await receive_upload(chunked(body), CONTENT_TYPE, str(directory), max_bytes=10 * len(body), block_size=4096)
+
+    assert received.fields == {"workspace_id": "ws", "title": "Reviews"}
+    assert received.filename == "reviews.csv"
+    assert open(received.file.path, "rb").read() == data
+    assert received.file.size == len(data)
+    assert received.file.content_hash == hashlib.sha256(data).hexdigest()
+    assert [p.name for p in directory.iterdir()] == [received.file.path.rsplit("/", 1)[-1]]
+
+@pytest.mark.asyncio
+async def test_receive_upload_enforces_max_size_while_streaming(tmp_path):
+    # No Content-Length (chunked transfer), so the limit is hit while reading
+    body = multipart_body({"title": "big"}, "big.csv", b"x" * 10000)
+    with pytest.raises(UploadTooLargeError):
+        await receive_upload(chunked(body, 1024), CONTENT_TYPE, str(tmp_path), max_bytes=5000, block_size=1024)
+
+    # The partial file is not left behind
+    assert list(tmp_path.iterdir()) == []
+
+@pytest.mark.asyncio
+async def test_receive_upload_rejects_declared_length_before_reading(tmp_path):
+    async def never_read():
+        raise AssertionError("body was read")
+        yield b""
+
+    with pytest.raises(UploadTooLargeError):
+        await receive_upload(never_read(), CONTENT_TYPE, str(tmp_path), content_length=100, max_bytes=10)
+    assert list(tmp_path.iterdir()) == []
+
+@pytest.mark.asyncio
+async def test_receive_upload_requires_a_file(tmp_path):
+    body = f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="title"\r\n\r\nx\r\n--{BOUNDARY}--\r\n'.encode()
+    with pytest.raises(InvalidUploadError):
+        await receive_upload(chunked(body), CONTENT_TYPE, str(tmp_path))
+    with pytest.raises(InvalidUploadError):
+        await receive_upload(chunked(body), "application/json", str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
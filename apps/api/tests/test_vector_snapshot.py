@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from apps.api.services import vector_snapshot
+from apps.api.services.vector_snapshot import WorkspaceVectorIndex, snapshot_dir, write_snapshot
+
+def _corpus(n=500, dim=384):
+    rng = np.random.default_rng(0)
+    return [f"chunk-{i}" for i in range(n)], rng.standard_normal((n, dim)).astype(np.float32)
+
+def test_snapshot_search_is_exact(tmp_path):
+    ids, vectors = _corpus()
+    path = str(tmp_path / "ws" / "3")
+    write_snapshot(path, ids, vectors.copy())
+
+    index = WorkspaceVectorIndex(path)
+    assert len(index) == len(ids)
+    assert isinstance(index.vectors, np.memmap)
+
+    queries = np.random.default_rng(1).standard_normal((4, 384)).astype(np.float32)
+    results = index.search(queries.tolist(), k=10)
+
+    # Brute-force cosine similarity for comparison
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    for query, hits in zip(queries, results):
+        scores = normalized @ (query / np.linalg.norm(query))
+        expected = np.argsort(-scores)[:10]
+        assert [chunk_id for chunk_id, _ in hits] == [ids[i] for i in expected]
+        assert [score for _, score in hits] == pytest.approx(scores[expected].tolist(), abs=1e-5)
+
+def test_snapshot_search_caps_k_at_corpus_size(tmp_path):
+    ids, vectors = _corpus(n=3)
+    path = str(tmp_path / "snap")
+    write_snapshot(path, ids, vectors)
+    assert len(WorkspaceVectorIndex(path).search([vectors[0].tolist()], k=10)[0]) == 3
+
+class _Generations:
+    def __init__(self, value):
+        self.value = value
+
+    def generation(self, workspace_id):
+        return self.value
+
+def test_get_index_only_serves_the_current_generation(tmp_path, monkeypatch):
+    ids, vectors = _corpus(n=20)
+    root = str(tmp_path)
+    write_snapshot(snapshot_dir("ws", 5, root), ids, vectors)
+
+    generations = _Generations(5)
+    monkeypatch.setattr(vector_snapshot, "search_cache", generations)
+    monkeypatch.setattr(vector_snapshot, "_indexes", vector_snapshot.OrderedDict())
+
+    index = vector_snapshot.get_index("ws", root)
+    assert index is not None and len(index) == 20
+    assert vector_snapshot.get_index("ws", root) is index
+
+    # Ingestion moved the workspace on: no snapshot until the next refresh
+    generations.value = 6
+    assert vector_snapshot.get_index("ws", root) is None
+    # Redis unavailable: freshness unknown, so never serve a snapshot
+    generations.value = None
+    assert vector_snapshot.get_index("ws", root) is None
@@ -1,6 +1,10 @@
-from celery import Celery
+import logging
+from typing import List
+from celery import Celery, chord
 from apps.api.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 celery_app = Celery(
     "worker",
     broker=settings.CELERY_BROKER_URL,
@@ -9,42 +13,130 @@ celery_app = Celery(
 
 celery_app.conf.task_routes = {
     "apps.api.worker.test_celery": "main-queue",
-    "apps.api.worker.process_workspace_sources": "main-queue"
+    "apps.api.worker.process_workspace_sources": "main-queue",
+    "apps.api.worker.process_source_batch": "main-queue",
+    "apps.api.worker.finalize_workspace_ingestion": "main-queue",
 }
 
+def _run_async(main):
+    import asyncio
+    from apps.api.db.session import engine
+    from apps.api.services.fetcher import close_fetcher
+
+    async def _wrapper():
+        try:
+            return await main()
+        finally:
+            await close_fetcher()
+            # Pooled connections are bound to this task's event loop
+            await engine.dispose()
+
+    return asyncio.run(_wrapper())
+
 @celery_app.task(acks_late=True)
 def test_celery(word: str) -> str:
     return f"test task return {word}"
 
 @celery_app.task(acks_late=True)
-def process_workspace_sources(workspace_id: str):
-    import asyncio
+def process_workspace_sources(workspace_id: str, refresh: bool = False):
     from sqlalchemy import select
     from apps.api.db.session import AsyncSessionLocal
     from apps.api.db import models
-    from apps.api.services import ingestion
+
+    # A refresh also revisits finished sources; unchanged ones are skipped by fingerprint
+    statuses = ["pending", "completed", "failed"] if refresh else ["pending"]
+
+    async def _run():
+        async with AsyncSessionLocal() as db:
+            # Find sources to process
+            result = await db.execute(
+                select(models.Source.id)
+                .where(models.Source.workspace_id == workspace_id)
+                .where(models.Source.status.in_(statuses))
+                .order_by(models.Source.created_at)
+            )
+            source_ids = list(result.scalars().all())
+
+            workspace = await db.get(models.Workspace, workspace_id)
+            if workspace:
+                workspace.status = "processing" if source_ids else "completed"
+                await db.commit()
+            return source_ids
+
+    source_ids = _run_async(_run)
+    if not source_ids:
+        return "Processed 0 sources"
+
+    # Fan out across the worker pool. The number of subtasks is capped so a large
+    # workspace never holds more than INGEST_MAX_PARALLEL_TASKS * INGEST_SOURCE_WORKERS
+    # DB sessions at once; each subtask pipelines its share of sources.
+    n_tasks = max(1, min(settings.INGEST_MAX_PARALLEL_TASKS, len(source_ids)))
+    batches = [source_ids[i::n_tasks] for i in range(n_tasks)]
+    chord([process_source_batch.s(batch) for batch in batches])(
+        finalize_workspace_ingestion.s(workspace_id)
+    )
+    return f"Dispatched {len(source_ids)} sources to {n_tasks} tasks"
+
+@celery_app.task(acks_late=True)
+def process_source_batch(source_ids: List[str]) -> List[str]:
+    from apps.api.db.session import AsyncSessionLocal
+    from apps.api.services.pipeline import run_ingestion_pipeline
+
+    async def _run():
+        # Staged pipeline: INGEST_SOURCE_WORKERS sources in flight, sharing one embed stage
+        await run_ingestion_pipeline(source_ids, AsyncSessionLocal)
+        return source_ids
+
+    # A failed header task would keep the chord body from running and leave the
+    # workspace "processing"; the batch's sources are returned either way and
+    # finalize_workspace_ingestion fails whichever of them did not finish.
+    try:
+        return _run_async(_run)
+    except Exception:
+        logger.exception("Ingestion batch of %d sources failed", len(source_ids))
+        return source_ids
+
+@celery_app.task(acks_late=True)
+def finalize_workspace_ingestion(results: List[List[str]], workspace_id: str):
+    from sqlalchemy import select, func, update
+    from apps.api.db.session import AsyncSessionLocal
+    from apps.api.db import models
+
+    from apps.api.services.vector_snapshot import refresh_snapshot
+
+    source_ids = [source_id for batch in results for source_id in batch]
 
     async def _run():
         async with AsyncSessionLocal() as db:
-            # Find pending sources
+            # Sources of this run still pending or processing were cut off by an
+            # error their own failure handling could not record
+            await db.execute(
+                update(models.Source)
+                .where(models.Source.id.in_(source_ids))
+                .where(models.Source.status.in_(["pending", "processing"]))
+                .values(status="failed", error_message="Ingestion task failed")
+            )
             result = await db.execute(
-                select(models.Source)
+                select(models.Source.status, func.count())
                 .where(models.Source.workspace_id == workspace_id)
-                .where(models.Source.status == "pending")
+                .group_by(models.Source.status)
             )
-            sources = result.scalars().all()
-            
-            results = []
-            for source in sources:
-                await ingestion.process_source(source.id, db)
-                results.append(source.id)
-            return f"Processed {len(results)} sources"
+            counts = dict(result.all())
+
+            workspace = await db.get(models.Workspace, workspace_id)
+            if workspace:
+                workspace.status = "completed_with_errors" if counts.get("failed") else "completed"
+                await db.commit()
 
-    return asyncio.run(_run())
+            # Small workspaces are searched in memory from a snapshot of their vectors
+            await refresh_snapshot(db, workspace_id)
+            return counts
+
+    counts = _run_async(_run)
+    return f"Processed {len(source_ids)} sources ({counts.get('failed', 0)} failed)"
 
 @celery_app.task(acks_late=True)
 def run_analytics(workspace_id: str):
-    import asyncio
     from apps.api.db.session import AsyncSessionLocal
     from apps.api.services import analytics
 
@@ -53,4 +145,4 @@ def run_analytics(workspace_id: str):
             await analytics.run_workspace_analytics(workspace_id, db)
             return "Analytics completed"
 
-    return asyncio.run(_run())
+    return _run_async(_run)